@@ -1,10 +1,31 @@
 import feedparser
-import requests
 import hashlib
 import json
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from urllib.parse import urlsplit
 
-from app.core.config import RAW_PATH, NEWSAPI_KEY
+from app.core.config import (
+    RAW_PATH,
+    NEWSAPI_KEY,
+    RSS_FEEDS,
+    COLLECT_MAX_WORKERS,
+    COLLECT_MAX_PAR_THEME,
+    FEED_TIMEOUT,
+    COLLECT_INCREMENTAL,
+    FEED_CACHE_ENABLED,
+    FEED_HEALTH_ENABLED,
+    HTTP_STATEFUL,
+    IA_THEME,
+)
+from app.core.feed_cache import FeedCache
+from app.core.feed_health import FeedHealth
+from app.core.near_duplicates import merge_near_duplicates
+from app.core.seen_index import SeenIndex
+from app.core.tokens import nettoyer_texte, compter
+from app.core import transport
 from app.core.logging_utils import setup_logger
 
 logger = setup_logger(__name__)
@@ -23,58 +44,263 @@ IA_FEEDS = [
     "https://www.semianalysis.com/feed",
 ]
 
+USER_AGENT = "Mozilla/5.0 (compatible; FlashAI-Collector/1.0)"
+
+# Thèmes de la config (souvent issus de detect_themes) → clés de RSS_FEEDS
+THEME_ALIASES = {
+    "ia": IA_THEME,
+    "ai": IA_THEME,
+    "machine learning": IA_THEME,
+    "deep learning": IA_THEME,
+    "data": IA_THEME,
+    "data science": IA_THEME,
+    "modeles de langage": IA_THEME,
+    "llm": IA_THEME,
+    "cloud": "technologie",
+    "tech": "technologie",
+}
+
 
 def _hash(text: str) -> str:
     """Hash MD5 pour supprimer les doublons (URL)."""
     return hashlib.md5((text or "").encode("utf-8")).hexdigest()
 
 
-def collect_from_rss(max_items: int = 20):
+def _entry_date(entry):
+    """Date de publication ISO 8601 (UTC) d'une entrée, ou None."""
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", parsed)
+
+
+def _texte(raw: str) -> str:
+    """Titre / résumé de flux débarrassé du HTML et des formules de fin de flux."""
+    clean = nettoyer_texte(raw)
+    compter("collecte", raw or "", clean)
+    return clean
+
+
+def _source(url: str, feed_title: str = "") -> str:
+    """Source d'une entrée sans champ source : titre du flux, sinon domaine de l'article."""
+    return feed_title or urlsplit(url or "").netloc
+
+
+def _parse_entry(entry, feed_title: str = ""):
+    """Transforme une entrée feedparser en article (None si pas de lien)."""
+    link = entry.get("link", "")
+    if not link:
+        return None
+
+    # Essai de récupérer une image
+    image = None
+    if "media_content" in entry:
+        mc = entry.get("media_content", [])
+        if mc and isinstance(mc, list):
+            image = mc[0].get("url")
+    elif "links" in entry:
+        for l in entry.links:
+            if l.get("type", "").startswith("image"):
+                image = l.get("href")
+                break
+
+    return {
+        "titre": _texte(entry.get("title", "")),
+        "resume": _texte(entry.get("summary", "")),
+        "url": link,
+        "source": (entry.get("source") or {}).get("title", "") or _source(link, feed_title),
+        "image": image,
+        "date_publication": _entry_date(entry),
+        "theme": IA_THEME,
+        "hash": _hash(link),
+    }
+
+
+def _normalize_theme(theme: str) -> str:
+    """Minuscules, sans accents : 'Économie ' → 'economie'."""
+    theme = unicodedata.normalize("NFKD", theme or "").encode("ascii", "ignore").decode("ascii")
+    return theme.strip().lower()
+
+
+_RSS_THEMES = {_normalize_theme(t): t for t in RSS_FEEDS}
+
+
+def resolve_themes(themes) -> list:
     """
-    Collecte RSS sur les flux IA.
-    Ne gère QUE le thème 'intelligence artificielle'.
+    Thèmes actifs de la config → thèmes connus de RSS_FEEDS (ordre conservé,
+    sans doublon). Sans thème reconnu, on retombe sur la veille IA.
     """
-    articles = []
+    resolved = []
+    for theme in themes or []:
+        key = _normalize_theme(theme)
+        key = _normalize_theme(THEME_ALIASES.get(key, key))
+        if key in _RSS_THEMES:
+            if _RSS_THEMES[key] not in resolved:
+                resolved.append(_RSS_THEMES[key])
+        else:
+            logger.warning("Thème inconnu ignoré pour la collecte : %s", theme)
+
+    return resolved or [IA_THEME]
+
+
+def plan_feeds(themes) -> dict:
+    """
+    Plan de collecte : { thème: [urls] } pour les thèmes actifs.
+    Le thème IA reprend aussi IA_FEEDS (notre liste historique).
+    Un même flux peut apparaître sous plusieurs thèmes : il ne sera
+    téléchargé qu'une fois (voir collect_from_rss).
+    """
+    plan = {}
+    for theme in resolve_themes(themes):
+        feeds = list(RSS_FEEDS.get(theme, []))
+        if theme == IA_THEME:
+            feeds = IA_FEEDS + feeds
+        plan[theme] = list(dict.fromkeys(feeds))
+    return plan
 
-    for url in IA_FEEDS:
-        try:
-            feed = feedparser.parse(url)
 
-            for entry in feed.entries[:max_items]:
-                link = entry.get("link", "")
-                if not link:
+def _fan_out(plan: dict, per_url: dict, quota: int) -> list:
+    """
+    Répartit les articles des flux vers les thèmes, avec au plus `quota`
+    articles par thème (0 = illimité). Les flux d'un thème sont pris en
+    tourniquet pour qu'un flux bavard ne remplisse pas seul le quota.
+    Un article présent sous plusieurs thèmes n'est émis qu'une fois ;
+    "theme" est le premier thème, "themes" la liste complète.
+    """
+    articles = []
+    by_hash = {}
+
+    for theme, urls in plan.items():
+        count = 0
+        for row in zip_longest(*(per_url.get(url, []) for url in urls)):
+            for art in row:
+                if art is None:
                     continue
+                if quota and count >= quota:
+                    break
 
-                # Essai de récupérer une image
-                image = None
-                if "media_content" in entry:
-                    mc = entry.get("media_content", [])
-                    if mc and isinstance(mc, list):
-                        image = mc[0].get("url")
-                elif "links" in entry:
-                    for l in entry.links:
-                        if l.get("type", "").startswith("image"):
-                            image = l.get("href")
-                            break
-
-                articles.append(
-                    {
-                        "titre": entry.get("title", "").strip(),
-                        "resume": entry.get("summary", "").strip(),
-                        "url": link,
-                        "source": (entry.get("source") or {}).get("title", "") or "RSS IA",
-                        "image": image,
-                        "theme": "intelligence artificielle",
-                        "hash": _hash(link),
-                    }
-                )
-
-        except Exception as e:
-            logger.error("❌ Erreur RSS %s : %s", url, e)
+                if art["hash"] in by_hash:
+                    known = by_hash[art["hash"]]
+                    if theme in known["themes"]:
+                        continue
+                    known["themes"].append(theme)
+                else:
+                    known = dict(art, theme=theme, themes=[theme])
+                    by_hash[art["hash"]] = known
+                    articles.append(known)
+                count += 1
 
     return articles
 
 
+def _fetch_feed(url: str, max_items: int = 20, timeout: float = FEED_TIMEOUT, cache: FeedCache = None,
+                health: FeedHealth = None):
+    """
+    Télécharge et parse UN flux RSS.
+    Le téléchargement passe par transport (requests) pour avoir un vrai timeout
+    (feedparser.parse(url) peut bloquer indéfiniment sur un flux lent).
+
+    Avec un cache : GET conditionnel, et un 304 renvoie les articles déjà parsés.
+    Avec un registre de santé : timeout adaptatif, latence et résultat enregistrés.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if cache is not None:
+        headers.update(cache.conditional_headers(url))
+    if health is not None:
+        timeout = health.timeout_for(url)
+
+    start = time.perf_counter()
+    try:
+        r = transport.request("GET", url, timeout=timeout, headers=headers)
+
+        if r.status_code == 304 and cache is not None and cache.has_entries(url):
+            articles = cache.hit(url)
+            # articles mis en cache avec l'ancien libellé générique
+            for art in articles:
+                if art.get("source") == "RSS IA":
+                    art["source"] = _source(art.get("url"))
+        else:
+            r.raise_for_status()
+            feed = feedparser.parse(r.content, response_headers=dict(r.headers))
+            if feed.bozo and not feed.entries:
+                raise ValueError(f"flux illisible ({feed.get('bozo_exception')})")
+
+            feed_title = nettoyer_texte(feed.feed.get("title", ""))
+            articles = []
+            for entry in feed.entries:
+                art = _parse_entry(entry, feed_title)
+                if art:
+                    articles.append(art)
+
+            if cache is not None:
+                cache.store(url, r.headers.get("ETag"), r.headers.get("Last-Modified"), articles)
+    except Exception as e:
+        logger.error("❌ Erreur RSS %s : %s", url, e)
+        if health is not None:
+            health.record_failure(url, time.perf_counter() - start, e)
+        return []
+
+    if health is not None:
+        health.record_success(url, time.perf_counter() - start, len(articles))
+
+    return articles[:max_items]
+
+
+def collect_from_rss(max_items: int = 20, max_workers: int = COLLECT_MAX_WORKERS,
+                     use_cache: bool = FEED_CACHE_ENABLED, themes=None, max_par_theme: int = COLLECT_MAX_PAR_THEME):
+    """
+    Collecte RSS sur les thèmes actifs (veille IA par défaut).
+
+    Chaque URL unique du plan n'est téléchargée qu'une fois, même si elle
+    sert plusieurs thèmes ; les articles sont ensuite répartis par thème
+    avec un quota de max_par_theme.
+
+    Les flux sont récupérés en parallèle (max_workers threads, 1 = séquentiel),
+    mais le résultat garde l'ordre du plan → raw_articles.json reproductible.
+    Avec use_cache, les flux inchangés depuis le dernier run (304) ne sont ni
+    re-téléchargés ni re-parsés.
+    Les flux en échec chronique (disjoncteur ouvert, voir FeedHealth) sont ignorés.
+    Cache et registre de santé ne servent qu'en HTTP_MODE=live (voir HTTP_STATEFUL).
+    """
+    plan = plan_feeds(themes)
+    urls = list(dict.fromkeys(url for feeds in plan.values() for url in feeds))
+    logger.info(
+        "📋 Plan de collecte : %d thème(s) → %d flux uniques (%d références)",
+        len(plan), len(urls), sum(len(feeds) for feeds in plan.values()),
+    )
+
+    health = FeedHealth() if FEED_HEALTH_ENABLED else None
+    skipped = [url for url in urls if health is not None and health.is_open(url)]
+    for url in skipped:
+        logger.info("⏭ Flux ignoré (disjoncteur ouvert) : %s", url)
+    to_fetch = [url for url in urls if url not in skipped]
+
+    workers = max(1, min(max_workers, len(to_fetch) or 1))
+    cache = FeedCache() if use_cache else None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # pool.map renvoie les résultats dans l'ordre des flux, pas d'arrivée
+        results = pool.map(lambda url: _fetch_feed(url, max_items, cache=cache, health=health), to_fetch)
+        per_url = dict(zip(to_fetch, results))
+
+    if health is not None:
+        health.save()
+    failed = sum(1 for url in to_fetch if not per_url[url])
+    logger.info(
+        "🩺 Santé des flux : %d récupérés, %d vides ou en échec, %d ignorés",
+        len(to_fetch) - failed, failed, len(skipped),
+    )
+
+    if cache is not None:
+        cache.save()
+        totals = cache.totals()
+        logger.info("🗃 Cache RSS : %d hit(s), %d miss(es)", totals["hits"], totals["misses"])
+        for url, counters in cache.stats.items():
+            logger.debug("Cache RSS %s : %s", url, counters)
+
+    return _fan_out(plan, per_url, max_par_theme)
+
+
 def collect_from_newsapi(max_items: int = 20):
     """
     Complément via NewsAPI sur le thème IA.
@@ -92,7 +318,7 @@ def collect_from_newsapi(max_items: int = 20):
     }
 
     try:
-        r = requests.get("https://newsapi.org/v2/everything", params=params, timeout=10)
+        r = transport.request("GET", "https://newsapi.org/v2/everything", params=params, timeout=10)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
@@ -107,12 +333,14 @@ def collect_from_newsapi(max_items: int = 20):
 
         articles.append(
             {
-                "titre": (art.get("title") or "").strip(),
-                "resume": (art.get("description") or "").strip(),
+                "titre": _texte(art.get("title")),
+                "resume": _texte(art.get("description")),
                 "url": url,
                 "source": art.get("source", {}).get("name", "NewsAPI"),
                 "image": art.get("urlToImage"),
-                "theme": "intelligence artificielle",
+                "date_publication": art.get("publishedAt"),
+                "theme": IA_THEME,
+                "themes": [IA_THEME],
                 "hash": _hash(url),
             }
         )
@@ -120,19 +348,28 @@ def collect_from_newsapi(max_items: int = 20):
     return articles
 
 
-def collecter_news(themes, max_par_flux: int = 20):
+def collecter_news(themes, max_par_flux: int = 20, incremental: bool = COLLECT_INCREMENTAL):
     """
-    Collecteur principal.
-    On ignore les thèmes de la config et on fait une veille IA globale :
-    - RSS IA
-    - + NewsAPI IA
+    Collecteur principal, piloté par les thèmes actifs de la config :
+    - RSS des thèmes (RSS_FEEDS, + IA_FEEDS pour l'IA ; veille IA par défaut)
+    - + NewsAPI si le thème IA est actif
     - suppression des doublons par URL
+    - fusion des quasi-doublons (même dépêche reprise par plusieurs sources)
+    - en mode incrémental : on écarte les articles déjà traités lors d'un
+      run précédent, y compris leurs reprises (voir marquer_articles_vus)
+
+    RSS et NewsAPI tournent en même temps ; l'ordre final reste RSS puis NewsAPI.
     """
 
-    logger.info("📡 Collecte IA (RSS + NewsAPI)…")
+    logger.info("📡 Collecte (RSS + NewsAPI)…")
+    start = time.perf_counter()
+    with_newsapi = IA_THEME in resolve_themes(themes)
 
-    rss_articles = collect_from_rss(max_par_flux)
-    news_articles = collect_from_newsapi(max_par_flux)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rss_future = pool.submit(collect_from_rss, max_par_flux, themes=themes)
+        news_future = pool.submit(collect_from_newsapi, max_par_flux) if with_newsapi else None
+        rss_articles = rss_future.result()
+        news_articles = news_future.result() if news_future else []
 
     combined = rss_articles + news_articles
 
@@ -145,7 +382,42 @@ def collecter_news(themes, max_par_flux: int = 20):
             seen.add(h)
             unique.append(art)
 
+    # fusion avant le filtre incrémental : une reprise d'un article déjà vu
+    # (autre URL, autre hash) est écartée avec lui
+    total = len(unique)
+    unique = merge_near_duplicates(unique)
+    if len(unique) < total:
+        logger.info("🧬 %d quasi-doublons fusionnés", total - len(unique))
+
+    if incremental:
+        index = SeenIndex()
+        total = len(unique)
+        new = index.filter_new(unique)
+        if len(new) < total:
+            # les nouvelles reprises d'articles déjà vus le deviennent aussi
+            kept = {id(art) for art in new}
+            index.mark([art for art in unique if id(art) not in kept])
+            index.save()
+        unique = new
+        logger.info("🆕 %d nouveaux articles sur %d (%d déjà vus)", len(unique), total, total - len(unique))
+
     RAW_PATH.write_text(json.dumps(unique, indent=2, ensure_ascii=False), encoding="utf-8")
 
-    logger.info("✔ %d articles IA collectés.", len(unique))
+    logger.info("✔ %d articles collectés en %.1fs.", len(unique), time.perf_counter() - start)
     return unique
+
+
+def marquer_articles_vus(articles):
+    """
+    Enregistre les articles dans l'index persistant des articles vus.
+    Appelé une fois la newsletter envoyée et le site publié : un run qui
+    échoue avant ne perd pas son delta.
+    """
+    if not HTTP_STATEFUL:
+        # record / replay : l'index des runs réels n'est pas modifié
+        return
+    index = SeenIndex()
+    # reprises fusionnées comprises : elles ne doivent pas revenir seules au prochain run
+    index.mark(articles)
+    index.save()
+    logger.info("🗂 Index des articles vus : %d entrées", len(index))
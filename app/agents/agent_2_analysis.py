@@ -1,9 +1,27 @@
-import json
-import re
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from typing import List, Dict
 
-from app.core.llm import groq_chat
-from app.core.config import ENRICHED_PATH
+from app.core.llm import groq_chat_json, LLMUnavailableError
+from app.core.config import (
+    ENRICHED_PATH,
+    ANALYSIS_CHECKPOINT_PATH,
+    ANALYSIS_WORKERS,
+    ANALYSIS_BATCH_SIZE,
+    ANALYSIS_BATCH_TOKENS,
+    ANALYSIS_BATCH_MAX_LATENCY,
+    TRIAGE_ENABLED,
+    ENRICHMENT_STORE_ENABLED,
+    BUDGET_ANALYSE_TOKENS,
+)
+from app.core.checkpoint import JsonlCheckpoint
+from app.core.enrichment_store import EnrichmentStore, input_digest
+from app.core.storage import write_json_atomic
+from app.core.structured import valider
+from app.core.triage import trier, enrichir_sans_llm
+from app.core.tokens import estimate_tokens, tronquer, compter, max_tokens_sortie
 from app.core.logging_utils import setup_logger
 
 logger = setup_logger(__name__)
@@ -47,15 +65,98 @@ Explique le contenu de façon claire et détaillée, en suivant STRICTEMENT le f
 """
 
 
-def _extract_json_block(text: str) -> dict:
-    """Essaye d'extraire un bloc JSON valide depuis la réponse du LLM."""
+SYSTEM_LOT = """
+Tu es un expert en intelligence artificielle.
+Tu reçois PLUSIEURS articles, chacun identifié par son "hash".
+Pour CHAQUE article, tu produis un objet JSON avec :
+
+- "hash" : le hash de l'article, recopié à l'identique.
+
+- "resume_detaille" : un résumé riche, informatif, précis (5 à 10 lignes),
+  qui explique directement les informations clés. Tu ne dois JAMAIS écrire
+  "l'article dit", "ce papier explique", "cet article raconte", etc.
+
+- "sous_theme" : un seul sous-thème parmi :
+  ["LLM", "machine learning", "deep learning", "NLP", "vision", "robotique",
+   "cloud AI", "sécurité IA", "chips & hardware IA", "recherche IA", "produits IA", "IA générative", "IA & société"]
+
+- "importance" : entier de 1 (peu important) à 5 (très important) pour une veille IA.
+
+- "tags": liste de 2 à 5 mots-clés courts (en français).
+
+FORMAT EXACT attendu : un objet JSON dont la clé "articles" contient
+un objet par article, dans l'ordre reçu.
+
+{
+  "articles": [
+    {"hash": "...", "resume_detaille": "...", "sous_theme": "...", "importance": 4, "tags": ["...", "..."]}
+  ]
+}
+
+Tu ne renvoies QUE ce JSON, sans texte autour.
+"""
+
+ARTICLE_LOT_TEMPLATE = """
+### hash : {hash}
+Titre : {titre}
+Source : {source}
+Résumé brut (venant du flux) :
+{resume}
+"""
+
+# Sortie attendue par article : résumé de 5 à 10 lignes (~150 mots)
+# + sous-thème, importance, tags et hash (~80 tokens)
+MOTS_RESUME = 150
+TOKENS_CHAMPS = 80
+MAX_TOKENS_PAR_ARTICLE = max_tokens_sortie(MOTS_RESUME, TOKENS_CHAMPS)
+
+# Version des prompts : toute modification invalide le store d'enrichissement
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM + USER_TEMPLATE + SYSTEM_LOT + ARTICLE_LOT_TEMPLATE).encode("utf-8")
+).hexdigest()[:16]
+
+
+# Schémas des réponses (validés par app/core/structured.py)
+SCHEMA_ANALYSE = {"resume_detaille": str, "sous_theme": str, "importance": int, "tags": [str]}
+SCHEMA_ARTICLE_LOT = {"hash": str, **SCHEMA_ANALYSE}
+# Le lot n'est vérifié qu'en surface : un article mal formé est re-demandé seul
+SCHEMA_LOT = {"articles": list}
+
+# Refus dus à la taille de la requête (contexte dépassé…) : le lot est re-découpé
+TOO_LARGE_STATUSES = {400, 413}
+
+
+def _fallback(article: Dict) -> Dict:
+    """Article non enrichi : valeurs par défaut, résumé brut conservé."""
+    enriched = dict(article)
+    enriched.setdefault("sous_theme", "IA – Divers")
+    enriched.setdefault("importance", 3)
+    enriched["resume"] = article.get("resume", "")
+    enriched.setdefault("tags", [])
+    enriched["analyse"] = "fallback"
+    return enriched
+
+
+def _appliquer(article: Dict, data: Dict) -> Dict:
+    """Fusionne la réponse du LLM dans l'article."""
+    enriched = dict(article)
+    enriched["resume"] = data.get("resume_detaille", article.get("resume", ""))
+    enriched["sous_theme"] = data.get("sous_theme", "IA – Divers")
     try:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if not match:
-            return {}
-        return json.loads(match.group(0))
-    except Exception:
-        return {}
+        enriched["importance"] = int(data.get("importance", 3))
+    except (TypeError, ValueError):
+        enriched["importance"] = 3
+    enriched["tags"] = data.get("tags", [])
+    enriched["analyse"] = "llm"
+    return enriched
+
+
+def _resume(article: Dict) -> str:
+    """Résumé brut tronqué au budget d'entrée de l'analyse."""
+    resume = article.get("resume", "")
+    court = tronquer(resume, BUDGET_ANALYSE_TOKENS)
+    compter("analyse", resume, court)
+    return court
 
 
 def analyser_article(article: Dict) -> Dict:
@@ -63,49 +164,244 @@ def analyser_article(article: Dict) -> Dict:
     user = USER_TEMPLATE.format(
         titre=article.get("titre", ""),
         source=article.get("source", ""),
-        resume=article.get("resume", ""),
+        resume=_resume(article),
     )
 
-    rep = groq_chat(SYSTEM, user, temperature=0.3, max_tokens=550)
-
-    if not rep:
-        logger.warning("Réponse LLM vide, fallback pour : %s", article.get("titre", ""))
-        enriched = dict(article)
-        enriched.setdefault("sous_theme", "IA – Divers")
-        enriched.setdefault("importance", 3)
-        enriched["resume"] = article.get("resume", "")
-        enriched.setdefault("tags", [])
-        return enriched
-
-    data = _extract_json_block(rep)
-    if not data:
-        logger.warning("JSON LLM invalide, fallback pour : %s", article.get("titre", ""))
-        enriched = dict(article)
-        enriched.setdefault("sous_theme", "IA – Divers")
-        enriched.setdefault("importance", 3)
-        enriched["resume"] = article.get("resume", "")
-        enriched.setdefault("tags", [])
-        return enriched
+    data = groq_chat_json(
+        SYSTEM, user, SCHEMA_ANALYSE,
+        temperature=0.3, max_tokens=MAX_TOKENS_PAR_ARTICLE, stage="analyse",
+    )
 
-    enriched = dict(article)
-    enriched["resume"] = data.get("resume_detaille", article.get("resume", ""))
-    enriched["sous_theme"] = data.get("sous_theme", "IA – Divers")
-    enriched["importance"] = int(data.get("importance", 3))
-    enriched["tags"] = data.get("tags", [])
+    if data is None:
+        logger.warning("Réponse LLM inutilisable, fallback pour : %s", article.get("titre", ""))
+        return _fallback(article)
+
+    return _appliquer(article, data)
+
+
+def analyser_lot(lot: List[Dict]) -> List[Dict]:
+    """
+    Analyse N articles en UNE requête (SYSTEM_LOT envoyé une seule fois).
+    Les réponses sont rattachées par hash ; si le tableau est illisible ou
+    incomplet, les articles manquants sont re-découpés en deux lots, jusqu'au
+    mode unitaire (de même pour une requête refusée car trop grosse). Si le
+    fournisseur ne répond pas (panne, erreurs HTTP après nouveaux essais et
+    bascule), tout le lot reçoit le fallback : le re-découper ne ferait que
+    multiplier les appels.
+    Renvoie les articles enrichis dans l'ordre du lot.
+    """
+    if len(lot) == 1:
+        return [analyser_article(lot[0])]
+
+    user = "".join(
+        ARTICLE_LOT_TEMPLATE.format(
+            hash=art["hash"],
+            titre=art.get("titre", ""),
+            source=art.get("source", ""),
+            resume=_resume(art),
+        )
+        for art in lot
+    )
+    try:
+        data = groq_chat_json(
+            SYSTEM_LOT, user, SCHEMA_LOT,
+            temperature=0.3, max_tokens=max_tokens_sortie(MOTS_RESUME, TOKENS_CHAMPS, n=len(lot)), stage="analyse_lot",
+            raise_on_error=True,
+        )
+    except LLMUnavailableError as e:
+        if e.status not in TOO_LARGE_STATUSES:
+            logger.error("❌ Lot de %d articles sans réponse (%s) → fallback", len(lot), e)
+            return [_fallback(art) for art in lot]
+        data = None  # requête trop grosse : re-découpage ci-dessous
+
+    by_hash = {
+        item["hash"]: item
+        for item in (data or {}).get("articles", [])
+        if valider(item, SCHEMA_ARTICLE_LOT) is None
+    }
+
+    results = [_appliquer(art, by_hash[art["hash"]]) if art["hash"] in by_hash else None for art in lot]
+    missing = [i for i, res in enumerate(results) if res is None]
+
+    if missing:
+        logger.warning("Lot de %d articles : %d réponse(s) manquante(s) → re-découpage", len(lot), len(missing))
+        todo = [lot[i] for i in missing]
+        half = (len(todo) + 1) // 2
+        redone = analyser_lot(todo[:half]) + (analyser_lot(todo[half:]) if todo[half:] else [])
+        for i, res in zip(missing, redone):
+            results[i] = res
+
+    return results
+
+
+class _TailleLot:
+    """
+    Taille de lot adaptative.
+    Départ : autant d'articles que le budget ANALYSIS_BATCH_TOKENS le permet
+    (tokens estimés en entrée + sortie par article), plafonné à max_size.
+    Ensuite : on réduit si un lot dépasse ANALYSIS_BATCH_MAX_LATENCY, on
+    augmente d'un cran s'il reste largement en dessous.
+    """
+
+    def __init__(self, articles: List[Dict], max_size: int):
+        per_article = sum(
+            estimate_tokens(ARTICLE_LOT_TEMPLATE) + estimate_tokens(a.get("titre", ""))
+            + min(estimate_tokens(a.get("resume", "")), BUDGET_ANALYSE_TOKENS)
+            for a in articles
+        ) / max(1, len(articles)) + MAX_TOKENS_PAR_ARTICLE
+        self.max_size = max_size
+        self.size = max(1, min(max_size, int(ANALYSIS_BATCH_TOKENS // per_article)))
+        self._lock = threading.Lock()
+        logger.info("📦 Lots d'analyse : ~%d tokens/article → %d articles/lot", per_article, self.size)
+
+    def observe(self, size: int, latency: float):
+        with self._lock:
+            if latency > ANALYSIS_BATCH_MAX_LATENCY and self.size > 1:
+                self.size = max(1, min(self.size, size) * 3 // 4)
+            elif latency < ANALYSIS_BATCH_MAX_LATENCY / 2 and size >= self.size:
+                self.size = min(self.max_size, self.size + 1)
 
-    return enriched
 
+def _executer(articles: List[Dict], max_workers: int, batch_size: int):
+    """
+    Générateur (indice, article enrichi), au fil des réponses.
+    batch_size <= 1 : un appel LLM par article ; sinon lots adaptatifs,
+    découpés au moment de la soumission pour profiter des derniers réglages.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if batch_size <= 1:
+            futures = {pool.submit(analyser_article, art): [i] for i, art in enumerate(articles)}
+            for future in as_completed(futures):
+                yield from _resultats(future, futures[future], articles)
+            return
 
-def analyser_articles(articles: List[Dict]) -> List[Dict]:
-    """Analyse toute la liste d'articles, sauvegarde en JSON."""
-    enriched = []
+        sizer = _TailleLot(articles, batch_size)
 
+        def run(lot):
+            start = time.perf_counter()
+            res = analyser_lot(lot)
+            sizer.observe(len(lot), time.perf_counter() - start)
+            return res
+
+        pending = {}
+        position = 0
+        while position < len(articles) or pending:
+            while position < len(articles) and len(pending) < max_workers:
+                indices = list(range(position, min(len(articles), position + sizer.size)))
+                pending[pool.submit(run, [articles[i] for i in indices])] = indices
+                position = indices[-1] + 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from _resultats(future, pending.pop(future), articles)
+
+
+def _resultats(future, indices: List[int], articles: List[Dict]):
+    try:
+        res = future.result()
+        if not isinstance(res, list):
+            res = [res]
+    except Exception as e:
+        logger.error("❌ Analyse impossible (%s) : %s", articles[indices[0]].get("titre", ""), e)
+        res = [_fallback(articles[i]) for i in indices]
+    yield from zip(indices, res)
+
+
+def analyser_articles(articles: List[Dict], max_workers: int = ANALYSIS_WORKERS,
+                      batch_size: int = ANALYSIS_BATCH_SIZE, use_store: bool = ENRICHMENT_STORE_ENABLED,
+                      triage: bool = TRIAGE_ENABLED) -> List[Dict]:
+    """
+    Analyse toute la liste d'articles, sauvegarde en JSON.
+
+    Avec use_store, les articles déjà enrichis lors d'un run précédent (même
+    hash, même contenu, même version des prompts) sont repris du store
+    d'enrichissement : seuls les nouveaux ou modifiés partent au LLM.
+
+    Chaque article enrichi est ajouté au journal ANALYSIS_CHECKPOINT_PATH dès
+    sa réception : un run interrompu reprend là où il s'était arrêté. Le JSON
+    final est écrit de façon atomique, puis le journal est supprimé.
+
+    Avec triage, un score local (voir app/core/triage.py) écarte le bruit
+    évident : ces articles reçoivent un sous-thème / une importance
+    heuristiques (analyse = "triage") sans appel LLM.
+
+    Les appels LLM partent en parallèle sur max_workers threads (1 = séquentiel) ;
+    le débit réel reste plafonné par le limiteur Groq partagé (voir llm.py).
+    Avec batch_size > 1, plusieurs articles partagent une même requête (analyser_lot).
+    Le résultat garde l'ordre d'entrée, un article en erreur reçoit le fallback.
+    """
     total = len(articles)
-    for i, art in enumerate(articles, start=1):
-        logger.info("🧠 Analyse LLM %d/%d", i, total)
-        enr = analyser_article(art)
-        enriched.append(enr)
+    enriched = [None] * total
+    start = time.perf_counter()
+
+    store = EnrichmentStore(PROMPT_VERSION) if use_store else None
+    if store is not None and store.invalidated:
+        logger.info("♻ Prompts d'analyse modifiés → store d'enrichissement invalidé")
+
+    checkpoint = JsonlCheckpoint(ANALYSIS_CHECKPOINT_PATH)
+    resumed = {
+        rec["hash"]: rec
+        for rec in checkpoint.load()
+        if rec.get("prompt_version") == PROMPT_VERSION
+    }
+
+    todo = []
+    from_checkpoint = 0
+    for i, art in enumerate(articles):
+        rec = resumed.get(art["hash"])
+        if rec and rec.get("input") == input_digest(art):
+            enriched[i] = rec["enriched"]
+            from_checkpoint += 1
+            if store is not None:
+                store.put(art, enriched[i])
+            continue
+
+        cached = store.get(art) if store is not None else None
+        if cached is not None:
+            enriched[i] = cached
+        else:
+            todo.append(i)
+
+    if from_checkpoint:
+        logger.info("⏯ Reprise : %d article(s) relus depuis le checkpoint", from_checkpoint)
+    if store is not None:
+        logger.info("♻ %d article(s) repris du store, %d à analyser", total - len(todo) - from_checkpoint, len(todo))
+
+    if triage and todo:
+        keep, skipped, scores = trier([articles[i] for i in todo])
+        for j in skipped:
+            enriched[todo[j]] = enrichir_sans_llm(articles[todo[j]], scores[j])
+        logger.info(
+            "🔎 Triage : %d article(s) → LLM, %d traités sans LLM (%.0f %% d'appels évités)",
+            len(keep), len(skipped), 100 * len(skipped) / len(todo),
+        )
+        todo = [todo[j] for j in keep]
+
+    workers = max(1, min(max_workers, len(todo) or 1))
+    batch = [articles[i] for i in todo]
+    try:
+        for done, (j, enr) in enumerate(_executer(batch, workers, batch_size), start=1):
+            i = todo[j]
+            enriched[i] = enr
+            if enr.get("analyse") == "llm":
+                checkpoint.append({
+                    "hash": articles[i]["hash"],
+                    "prompt_version": PROMPT_VERSION,
+                    "input": input_digest(articles[i]),
+                    "enriched": enr,
+                })
+                if store is not None:
+                    store.put(articles[i], enr)
+            logger.info("🧠 Analyse LLM %d/%d", done, len(todo))
+    finally:
+        checkpoint.close()
+
+    logger.info("✔ %d articles analysés en %.1fs (%d workers)", len(todo), time.perf_counter() - start, workers)
+
+    write_json_atomic(ENRICHED_PATH, enriched, indent=2)
+    if store is not None:
+        store.save()
+    checkpoint.clear()
 
-    ENRICHED_PATH.write_text(json.dumps(enriched, indent=2, ensure_ascii=False), encoding="utf-8")
     logger.info("✔ Articles enrichis sauvegardés → %s", ENRICHED_PATH)
     return enriched
@@ -1,10 +1,17 @@
 import json
-import re
 from typing import List, Dict
 
-from app.core.llm import groq_chat
-from app.core.config import SELECTION_PATH
+from app.core.llm import groq_chat_json
+from app.core.config import (
+    SELECTION_PATH,
+    CURATOR_MODE,
+    CURATOR_TOP_K,
+    CURATOR_PROMPT_TOKENS,
+    CURATOR_RESUME_CHARS,
+)
 from app.core.logging_utils import setup_logger
+from app.core.selection import selection_mmr, choisir_selection_locale
+from app.core.tokens import estimate_tokens, max_tokens_sortie
 
 logger = setup_logger(__name__)
 
@@ -34,43 +41,117 @@ Choisis :
 - renvoie STRICTEMENT un JSON valide.
 """
 
+PROMPT_COMPACT = """
+Voici les articles candidats, présélectionnés. Chaque article a un indice "i" :
 
-def _extract_json(raw: str) -> dict:
-    """Récupère un JSON même si le LLM met du texte avant/après."""
-    try:
-        match = re.search(r"\{[\s\S]*\}", raw)
-        if match:
-            return json.loads(match.group(0))
-    except:
-        pass
-    return {}
+{articles}
+
+Choisis :
+- les articles les plus pertinents (utilise leurs indices "i")
+- maximum 10
+- renvoie STRICTEMENT un JSON valide.
+"""
+
+# En dessous, on ne réduit plus le nombre de candidats : on raccourcit les résumés
+MIN_CANDIDATS = 5
+
+
+SCHEMA_SELECTION = {"indices_selection": [int], "index_audio": int}
+
+# Sortie attendue : au plus 10 indices + l'index audio
+MAX_TOKENS_SELECTION = max_tokens_sortie(0, fixe=60)
+
+
+def preclasser(articles: List[Dict], k: int = CURATOR_TOP_K) -> List[int]:
+    """
+    Pré-classement local des articles (sans LLM) : moteur MMR de
+    app/core/selection.py (importance + fraîcheur, diversité de sources,
+    de sous-thèmes et de contenu). Renvoie au plus k indices.
+    """
+    return selection_mmr(articles, k)
 
 
-def choisir_selection(articles: List[Dict]) -> Dict:
+def _projection(i: int, article: Dict, resume_chars: int) -> Dict:
+    """Vue compacte d'un article pour le prompt : pas d'image, hash, tags…"""
+    resume = " ".join((article.get("resume") or "").split())
+    if len(resume) > resume_chars:
+        resume = resume[:resume_chars].rsplit(" ", 1)[0] + "…"
+    return {
+        "i": i,
+        "titre": article.get("titre", ""),
+        "sous_theme": article.get("sous_theme", ""),
+        "importance": article.get("importance", 3),
+        "resume": resume,
+    }
+
+
+def construire_prompt_compact(articles: List[Dict], k: int = CURATOR_TOP_K,
+                              budget: int = CURATOR_PROMPT_TOKENS):
+    """
+    Prompt du curateur limité à `budget` tokens (prompt système compris) :
+    top-k du pré-classement en projection compacte. Si ça déborde, on retire
+    les derniers candidats, puis on raccourcit les résumés.
+    Renvoie (prompt, indices candidats).
+    """
+    candidates = preclasser(articles, k)
+    resume_chars = CURATOR_RESUME_CHARS
+
+    while True:
+        rows = [_projection(i, articles[i], resume_chars) for i in candidates]
+        prompt = PROMPT_COMPACT.format(articles="\n".join(json.dumps(r, ensure_ascii=False) for r in rows))
+        if estimate_tokens(SYSTEM) + estimate_tokens(prompt) <= budget:
+            return prompt, candidates
+        if len(candidates) > MIN_CANDIDATS:
+            candidates = candidates[:-1]
+        elif resume_chars > 0:
+            resume_chars = resume_chars // 2 if resume_chars > 20 else 0
+        else:
+            return prompt, candidates
+
+
+def _enregistrer(result: Dict) -> Dict:
+    SELECTION_PATH.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    return result
+
+
+def choisir_selection(articles: List[Dict], mode: str = CURATOR_MODE) -> Dict:
     """Retourne :
     - indices_selection : liste d'indices
     - index_audio : indice principal
-    """
 
-    try:
+    mode "compact" (défaut) : pré-classement local puis LLM sur les top-K
+    en projection compacte, prompt borné par CURATOR_PROMPT_TOKENS.
+    mode "full" : tout le corpus est envoyé au LLM (ancien comportement).
+    mode "local" : sélection MMR locale, aucun appel LLM.
+    En cas d'échec du LLM, la sélection locale sert de fallback.
+    """
+    if mode == "local":
+        result = choisir_selection_locale(articles)
+        logger.info("✔ Sélection locale (MMR) générée")
+        return _enregistrer(result)
+
+    if mode == "compact":
+        prompt, candidates = construire_prompt_compact(articles)
+        logger.info("📝 Curateur : %d candidats, ~%d tokens de prompt", len(candidates), estimate_tokens(prompt))
+    else:
         prompt = PROMPT.format(articles=json.dumps(articles, ensure_ascii=False))
-        rep = groq_chat(SYSTEM, prompt, temperature=0.2, max_tokens=600)
+        candidates = list(range(len(articles)))
+    default = candidates[:5]
 
-        if not rep:
-            raise ValueError("Réponse vide du LLM")
-
-        data = _extract_json(rep)
+    try:
+        data = groq_chat_json(SYSTEM, prompt, SCHEMA_SELECTION, temperature=0.2, max_tokens=MAX_TOKENS_SELECTION, stage="curateur")
 
-        if not data:
-            raise ValueError("JSON impossible à extraire")
+        if data is None:
+            raise ValueError("Réponse du LLM inutilisable")
 
+        allowed = set(candidates)
         indices = [
             i for i in data.get("indices_selection", [])
-            if isinstance(i, int) and 0 <= i < len(articles)
+            if isinstance(i, int) and i in allowed
         ]
 
         if not indices:
-            indices = list(range(min(5, len(articles))))
+            indices = default
 
         audio_idx = data.get("index_audio", indices[0])
         if audio_idx not in indices:
@@ -81,18 +162,13 @@ def choisir_selection(articles: List[Dict]) -> Dict:
             "index_audio": audio_idx,
         }
 
-        SELECTION_PATH.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        _enregistrer(result)
 
         logger.info("✔ Sélection IA générée")
         return result
 
     except Exception as e:
         logger.error("❌ Curator IA erreur : %s", e)
-        logger.warning("➡ Fallback automatique utilisé")
+        logger.warning("➡ Fallback automatique utilisé (sélection locale MMR)")
 
-        fallback = {
-            "indices_selection": list(range(min(5, len(articles)))),
-            "index_audio": 0
-        }
-        SELECTION_PATH.write_text(json.dumps(fallback, indent=2, ensure_ascii=False), encoding="utf-8")
-        return fallback
+        return _enregistrer(choisir_selection_locale(articles))
@@ -1,13 +1,22 @@
 import base64
-import requests
-from app.core.llm import groq_chat
-from app.core.config import AUDIO_PATH, GROQ_API_KEY
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.llm import groq_chat, groq_chat_stream, groq_post, phrases
+from app.core.config import (
+    AUDIO_PATH,
+    BUDGET_SCRIPT_TOKENS,
+    TTS_URL,
+    TTS_WORKERS,
+    TTS_CHUNK_CHARS,
+)
 from app.core.logging_utils import setup_logger
+from app.core.telemetry import telemetry
+from app.core.tokens import tronquer, compter, max_tokens_sortie
 
 logger = setup_logger(__name__)
 
-TTS_URL = "https://api.groq.com/openai/v1/audio/speech"
-
 SYSTEM = """
 Tu es un présentateur professionnel.
 Écris un script de capsule audio (2 minutes max), clair et direct,
@@ -22,39 +31,245 @@ Résumé : {resume}
 Écris un script dynamique et informatif.
 """
 
+USER_MULTI = """
+Voici {n} actualités à présenter dans la même capsule, dans cet ordre :
+{articles}
+Durée visée : {minutes} minutes.
+Écris un script dynamique et informatif, avec des transitions naturelles entre les sujets.
+"""
 
-def generer_script_audio(article):
-    prompt = USER.format(
+ARTICLE_MULTI = """
+Titre : {titre}
+Source : {source}
+Résumé : {resume}
+"""
+
+# Débit de lecture : ~150 mots par minute ; 2 minutes pour un article,
+# une de plus par article supplémentaire
+MOTS_PAR_MINUTE = 150
+MAX_TOKENS_SCRIPT = max_tokens_sortie(2 * MOTS_PAR_MINUTE)
+
+# Taille minimale d'un segment envoyé au TTS (évite une requête par phrase courte)
+SEGMENT_MIN_CHARS = 200
+
+# Lecture des réponses TTS par blocs (jamais le MP3 entier en mémoire)
+TTS_READ_CHUNK = 64 * 1024
+
+SCRIPT_DEFAUT = "Bienvenue dans votre capsule audio Flash AI."
+
+
+def _prompt(article):
+    resume = article.get("resume","")
+    court = tronquer(resume, BUDGET_SCRIPT_TOKENS)
+    compter("script_audio", resume, court)
+    return USER.format(
         titre=article.get("titre",""),
         source=article.get("source",""),
-        resume=article.get("resume",""),
+        resume=court,
     )
-    return groq_chat(SYSTEM, prompt, temperature=0.4, max_tokens=500)
 
 
-def generer_audio(script: str):
-    if not script:
-        script = "Bienvenue dans votre capsule audio Flash AI."
+def _prompt_capsule(articles):
+    """Prompt et max_tokens du script : un article, ou plusieurs enchaînés."""
+    if len(articles) == 1:
+        return _prompt(articles[0]), MAX_TOKENS_SCRIPT
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    # le budget d'entrée est partagé entre les articles
+    budget = BUDGET_SCRIPT_TOKENS // len(articles)
+    blocks = []
+    for article in articles:
+        resume = article.get("resume", "")
+        court = tronquer(resume, budget)
+        compter("script_audio", resume, court)
+        blocks.append(ARTICLE_MULTI.format(titre=article.get("titre", ""), source=article.get("source", ""), resume=court))
+
+    minutes = len(articles) + 1
+    prompt = USER_MULTI.format(n=len(articles), articles="".join(blocks), minutes=minutes)
+    return prompt, max_tokens_sortie(minutes * MOTS_PAR_MINUTE)
+
+
+def generer_script_audio(article):
+    return groq_chat(SYSTEM, _prompt(article), temperature=0.4, max_tokens=MAX_TOKENS_SCRIPT, stage="audio")
+
+
+def decouper_script(script: str, max_chars: int = TTS_CHUNK_CHARS):
+    """
+    Découpe le script en morceaux d'au plus max_chars, en fin de phrase
+    (une phrase plus longue que max_chars forme un morceau à elle seule).
+    """
+    chunks = []
+    current = ""
+    for phrase in phrases([script]):
+        if current and len(current) + 1 + len(phrase) > max_chars:
+            chunks.append(current)
+            current = phrase
+        else:
+            current = f"{current} {phrase}" if current else phrase
+    if current:
+        chunks.append(current)
+    return chunks
 
+
+def _tts(texte: str, path) -> bool:
+    """
+    Synthèse d'un texte, écrite par blocs dans `path` au fil de la réception.
+    False en cas d'erreur (fichier supprimé).
+    """
     payload = {
         "model": "gpt-4o-mini-tts",
-        "input": script,
+        "input": texte,
         "voice": "alloy",
         "format": "mp3"
     }
 
+    start = time.perf_counter()
+    size = 0
+    try:
+        r = groq_post(TTS_URL, payload, stream=True)
+        with r:
+            if r.status_code == 200:
+                with open(path, "wb") as f:
+                    for block in r.iter_content(TTS_READ_CHUNK):
+                        f.write(block)
+                        size += len(block)
+            else:
+                logger.error("❌ Erreur Groq TTS : %s", r.text)
+    except Exception as e:
+        logger.error("❌ Erreur Groq TTS : %s", e)
+        telemetry.record("tts", "audio", "groq", None, time.perf_counter() - start, caracteres=len(texte))
+        path.unlink(missing_ok=True)
+        return False
+
+    telemetry.record(
+        "tts", "audio", "groq", r.status_code, time.perf_counter() - start,
+        caracteres=len(texte), octets=size,
+    )
+    return r.status_code == 200
+
+
+def _id3v2_size(f) -> int:
+    """Taille de l'étiquette ID3v2 en tête de fichier (0 si absente)."""
+    header = f.read(10)
+    f.seek(0)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    return 10 + size + (10 if header[5] & 0x10 else 0)
+
+
+def _ajouter_mp3(src, out, premier: bool):
+    """
+    Ajoute un segment MP3 à la capsule. Les trames MPEG se concatènent telles
+    quelles ; seules les étiquettes ID3 des segments suivants sont retirées
+    (ID3v2 en tête, ID3v1 "TAG" en fin).
+    """
+    total = src.stat().st_size
+    with open(src, "rb") as f:
+        end = total
+        if not premier:
+            f.seek(_id3v2_size(f))
+            if total >= 128:
+                here = f.tell()
+                f.seek(total - 128)
+                if f.read(3) == b"TAG":
+                    end = total - 128
+                f.seek(here)
+        remaining = end - f.tell()
+        while remaining > 0:
+            block = f.read(min(TTS_READ_CHUNK, remaining))
+            if not block:
+                break
+            out.write(block)
+            remaining -= len(block)
+
+
+def _synthetiser(segments, start: float) -> int:
+    """
+    Synthèse parallèle (TTS_WORKERS) des segments, dans l'ordre :
+    chaque segment est reçu en flux dans son propre fichier, puis ajouté au
+    fichier temporaire de la capsule dès que tous les précédents le sont.
+    `segments` peut être un générateur (script encore en cours d'écriture).
+    AUDIO_PATH n'est remplacé que si tous les segments ont réussi.
+    Renvoie le nombre de segments (0 en cas d'échec).
+    """
+    tmp = AUDIO_PATH.with_name(AUDIO_PATH.name + ".part")
+    futures = []
+    written = 0
+    ok = True
+
+    with ThreadPoolExecutor(max_workers=TTS_WORKERS) as pool, open(tmp, "wb") as out:
+
+        def ecrire(bloquant: bool):
+            nonlocal written, ok
+            while written < len(futures) and (bloquant or futures[written].done()):
+                part = tmp.with_name(f"{tmp.name}.{written}")
+                if not futures[written].result():
+                    ok = False
+                elif ok:
+                    _ajouter_mp3(part, out, premier=written == 0)
+                    out.flush()
+                    if written == 0:
+                        logger.info("⏱ Capsule audio : premier segment MP3 en %.2fs", time.perf_counter() - start)
+                part.unlink(missing_ok=True)
+                written += 1
+
+        for i, segment in enumerate(segments):
+            futures.append(pool.submit(_tts, segment, tmp.with_name(f"{tmp.name}.{i}")))
+            ecrire(bloquant=False)
+        ecrire(bloquant=True)
+
+    if not ok or not futures:
+        tmp.unlink(missing_ok=True)
+        logger.error("❌ Capsule audio incomplète, fichier non remplacé")
+        return 0
+
+    os.replace(tmp, AUDIO_PATH)
+    return len(futures)
+
+
+def generer_audio(script: str):
+    if not script:
+        script = SCRIPT_DEFAUT
+
     logger.info("🎤 Envoi au TTS Groq…")
 
-    r = requests.post(TTS_URL, json=payload, headers=headers)
+    start = time.perf_counter()
+    n = _synthetiser(decouper_script(script), start)
+    if n:
+        logger.info("🎧 Audio généré → %s (%d segments, %.1fs)", AUDIO_PATH, n, time.perf_counter() - start)
+
+
+def generer_capsule_audio(articles) -> str:
+    """
+    Script + audio en flux, pour un article ou une liste d'articles
+    (capsule multi-sujets) : le script est lu au fil de la génération et
+    chaque groupe de phrases terminé part au TTS pendant que le LLM écrit
+    la suite ; les synthèses tournent en parallèle et sont assemblées dans
+    l'ordre (voir _synthetiser).
+    Renvoie le script complet.
+    """
+    if isinstance(articles, dict):
+        articles = [articles]
+    start = time.perf_counter()
+    prompt, max_tokens = _prompt_capsule(articles)
+    script = []
+
+    def segments():
+        flux = groq_chat_stream(SYSTEM, prompt, temperature=0.4, max_tokens=max_tokens, stage="audio")
+        for segment in phrases(flux, min_chars=SEGMENT_MIN_CHARS):
+            if not script:
+                logger.info("⏱ Script audio : premier segment en %.2fs", time.perf_counter() - start)
+            # un segment trop long (phrases sans ponctuation) est redécoupé
+            for chunk in decouper_script(segment):
+                script.append(chunk)
+                yield chunk
+        if not script:
+            script.append(SCRIPT_DEFAUT)
+            yield SCRIPT_DEFAUT
 
-    if r.status_code != 200:
-        logger.error("❌ Erreur Groq TTS : %s", r.text)
-        return
+    logger.info("🎤 Script en flux → TTS Groq (%d article(s))…", len(articles))
+    n = _synthetiser(segments(), start)
+    if n:
+        logger.info("🎧 Audio généré → %s (%d segments, %.1fs)", AUDIO_PATH, n, time.perf_counter() - start)
 
-    AUDIO_PATH.write_bytes(r.content)
-    logger.info("🎧 Audio généré → %s", AUDIO_PATH)
+    return " ".join(script)
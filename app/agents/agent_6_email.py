@@ -3,11 +3,14 @@ import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import time
 from dotenv import load_dotenv
 
-from app.core.config import EMAIL_DRAFT_PATH, BLOG_PUBLIC_URL
+from app.core.config import EMAIL_DRAFT_PATH, BLOG_PUBLIC_URL, BUDGET_EMAIL_TOKENS
 from app.core.user_config import load_user_config, get_all_emails_from_csv
-from app.core.llm import groq_chat
+from app.core.llm import groq_chat_stream
+from app.core import transport
+from app.core.tokens import tronquer, compter, max_tokens_sortie
 from app.core.logging_utils import setup_logger
 
 load_dotenv()
@@ -40,7 +43,7 @@ def send_email_smtp2go_api(to_email: str, subject: str, html_content: str, text_
             "html_body": html_content
         }
         
-        response = requests.post(SMTP2GO_API_URL, json=payload, timeout=30)
+        response = transport.request("POST", SMTP2GO_API_URL, json=payload, timeout=30)
         response.raise_for_status()
         
         result = response.json()
@@ -193,23 +196,40 @@ Voici les 3 articles IA sélectionnés :
 Écris une introduction de 5 à 7 lignes.
 """
 
+# Introduction de 5 à 7 lignes : ~120 mots
+MAX_TOKENS_INTRO = max_tokens_sortie(120)
+
 
 # ---------------------------------------------------------------------
 # 🚀 Génération + Envoi
 # ---------------------------------------------------------------------
-def generer_email_top3(enriched, top3, idx_audio):
+def generer_email_top3(enriched, top3, idx_audio) -> bool:
+    """Génère et envoie l'email du top 3 ; False si un envoi a échoué."""
 
     # 1) Construire texte pour LLM
     block = ""
     for idx in top3:
         a = enriched[idx]
-        block += f"- {a['titre']}\n{a['resume']}\n\n"
-
-    intro = groq_chat(SYSTEM, USER.format(block=block), temperature=0.2, max_tokens=400)
+        resume = tronquer(a['resume'], BUDGET_EMAIL_TOKENS)
+        compter("email", a['resume'], resume)
+        block += f"- {a['titre']}\n{resume}\n\n"
+
+    # Brouillon écrit au fil de la génération
+    start = time.perf_counter()
+    parts = []
+    with open(EMAIL_DRAFT_PATH, "w", encoding="utf-8") as draft:
+        flux = groq_chat_stream(SYSTEM, USER.format(block=block), temperature=0.2, max_tokens=MAX_TOKENS_INTRO, stage="email")
+        for delta in flux:
+            if not parts:
+                logger.info("⏱ Email : premier texte en %.2fs", time.perf_counter() - start)
+            parts.append(delta)
+            draft.write(delta)
+            draft.flush()
+
+    intro = "".join(parts)
     if not intro:
         intro = "Voici les actualités IA importantes de la semaine."
-
-    EMAIL_DRAFT_PATH.write_text(intro, encoding="utf-8")
+        EMAIL_DRAFT_PATH.write_text(intro, encoding="utf-8")
 
     # 2) HTML articles
     articles_html = ""
@@ -227,14 +247,16 @@ def generer_email_top3(enriched, top3, idx_audio):
     recipients = get_all_emails_from_csv()
     if not recipients:
         logger.warning("❌ Aucun destinataire d'email configuré.")
-        return
+        return True
 
     # 5) Envoi via SMTP2GO
     subject = "🔥 Flash AI – Top 3 IA"
+    ok = True
     for recipient in recipients:
-        send_email_smtp2go(
+        ok = send_email_smtp2go(
             to_email=recipient,
             subject=subject,
             html_content=html_email,
             text_content=intro
-        )
+        ) and ok
+    return ok
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+
+from app.core.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class JsonlCheckpoint:
+    """
+    Journal de reprise en JSONL, en ajout seul : une ligne par résultat,
+    écrite (flush + fsync) dès qu'il est produit. Après un crash, load()
+    relit tout ce qui a été terminé ; une dernière ligne tronquée est ignorée
+    et les ajouts suivants reprennent sur une nouvelle ligne.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> list:
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for n, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Checkpoint %s : ligne %d illisible ignorée", self.path.name, n)
+        return records
+
+    def append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                # reprise après un crash : la ligne tronquée est close pour ne
+                # pas y coller le premier nouveau résultat
+                if not self._ends_with_newline():
+                    line = "\n" + line
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except FileNotFoundError:
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """À appeler une fois le résultat final écrit : le journal ne sert plus."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -13,6 +13,49 @@ load_dotenv(BASE_DIR / ".env")
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1").rstrip("/")
+TTS_URL = os.getenv("TTS_URL", f"{GROQ_BASE_URL}/audio/speech")
+# Capsule audio : synthèses TTS en parallèle, taille max d'un morceau
+# (coupé en fin de phrase) et nombre d'articles présentés (1 au minimum chacun)
+TTS_WORKERS = max(1, int(os.getenv("TTS_WORKERS", "4")))
+TTS_CHUNK_CHARS = max(1, int(os.getenv("TTS_CHUNK_CHARS", "600")))
+CAPSULE_ARTICLES = max(1, int(os.getenv("CAPSULE_ARTICLES", "1")))
+
+# Fournisseurs de secours (API compatibles OpenAI), essayés dans l'ordre après Groq.
+# JSON : [{"name": "...", "base_url": "...", "model": "...", "api_key_env": "...", "rpm": 0, "tpm": 0}]
+# (lu à la construction des fournisseurs : une valeur invalide est ignorée avec un avertissement)
+LLM_FALLBACK_PROVIDERS = os.getenv("LLM_FALLBACK_PROVIDERS", "")
+# Nouveaux essais sur un fournisseur qui a un suivant (on bascule plutôt que d'insister)
+LLM_FAILOVER_RETRIES = int(os.getenv("LLM_FAILOVER_RETRIES", "1"))
+# Requête couverte (hedge) : doublon envoyé si le primaire dépasse son p95 observé
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "True") == "True"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+
+# Client HTTP Groq : timeouts (secondes), nouveaux essais et taille du pool de connexions
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "1"))
+GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "30"))
+GROQ_POOL_SIZE = int(os.getenv("GROQ_POOL_SIZE", "16"))
+
+# Quotas Groq (requêtes et tokens par minute, 0 = illimité) et marge de sécurité
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "8000"))
+GROQ_RATE_HEADROOM = float(os.getenv("GROQ_RATE_HEADROOM", "0.9"))
+
+# Budgets de tokens d'entrée par appel (textes d'articles tronqués au-delà)
+BUDGET_ANALYSE_TOKENS = int(os.getenv("BUDGET_ANALYSE_TOKENS", "350"))
+BUDGET_SCRIPT_TOKENS = int(os.getenv("BUDGET_SCRIPT_TOKENS", "600"))
+BUDGET_EMAIL_TOKENS = int(os.getenv("BUDGET_EMAIL_TOKENS", "150"))
+# Tokens réservés au raisonnement du modèle dans chaque max_tokens
+# (0 pour un modèle sans raisonnement)
+LLM_REASONING_TOKENS = int(os.getenv("LLM_REASONING_TOKENS", "200"))
+
+# Mode JSON natif (response_format) pour les appels structurés ; désactivé
+# automatiquement pour chaque fournisseur qui le refuse
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "True") == "True"
 
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
 
@@ -33,10 +76,96 @@ AUDIO_PATH = DATA_DIR / "capsule.mp3"
 BLOG_HTML_PATH = DATA_DIR / "blog.html"
 EMAIL_DRAFT_PATH = DATA_DIR / "email_draft.txt"
 
+# Transport HTTP : live (réseau), record (réseau + cassettes), replay (cassettes seules)
+HTTP_MODE = os.getenv("HTTP_MODE", "live")
+HTTP_CASSETTE_DIR = Path(os.getenv("HTTP_CASSETTE_DIR", DATA_DIR / "cassettes"))
+HTTP_REPLAY_LATENCY_MS = float(os.getenv("HTTP_REPLAY_LATENCY_MS", "0"))
+HTTP_REPLAY_JITTER_MS = float(os.getenv("HTTP_REPLAY_JITTER_MS", "0"))
+# En record / replay, l'état conservé d'un run à l'autre (articles vus, store
+# d'enrichissement, caches LLM et RSS, santé des flux) est ignoré et n'est pas
+# modifié : chaque run rejoue exactement les mêmes requêtes que l'enregistrement
+HTTP_STATEFUL = HTTP_MODE == "live"
+
+# Cache des flux RSS (ETag / Last-Modified + articles parsés)
+FEED_CACHE_ENABLED = HTTP_STATEFUL
+FEED_CACHE_PATH = DATA_DIR / "feed_cache.json"
+
+# Collecte incrémentale : index des articles déjà vus + fenêtre d'éviction (jours)
+SEEN_INDEX_PATH = DATA_DIR / "seen_articles.json"
+SEEN_WINDOW_DAYS = float(os.getenv("SEEN_WINDOW_DAYS", "30"))
+COLLECT_INCREMENTAL = HTTP_STATEFUL and os.getenv("COLLECT_INCREMENTAL", "True") == "True"
+
+# Quasi-doublons (MinHash-LSH) : similarité de Jaccard minimale, 0 = désactivé
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.6"))
+
+# Collecte : nombre de flux récupérés en parallèle et timeout par flux (secondes)
+COLLECT_MAX_WORKERS = int(os.getenv("COLLECT_MAX_WORKERS", "8"))
+FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "10"))
+# Santé des flux : timeout adaptatif (borné entre FEED_TIMEOUT_MIN et FEED_TIMEOUT)
+# et disjoncteur (flux ignoré après N échecs consécutifs, back-off exponentiel)
+FEED_HEALTH_PATH = DATA_DIR / "feed_health.json"
+FEED_HEALTH_ENABLED = HTTP_STATEFUL
+FEED_TIMEOUT_MIN = float(os.getenv("FEED_TIMEOUT_MIN", "3"))
+FEED_BREAKER_THRESHOLD = int(os.getenv("FEED_BREAKER_THRESHOLD", "3"))
+FEED_BREAKER_BACKOFF_HOURS = float(os.getenv("FEED_BREAKER_BACKOFF_HOURS", "6"))
+# Nombre max d'articles retenus par thème actif (après répartition des flux)
+COLLECT_MAX_PAR_THEME = int(os.getenv("COLLECT_MAX_PAR_THEME", "100"))
+
+# Analyse LLM : nombre d'articles analysés en parallèle (1 = séquentiel)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+# Analyse par lots : nb max d'articles par requête (1 = une requête par article),
+# budget de tokens (entrée + sortie) visé par lot et latence max souhaitée (s)
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "1"))
+ANALYSIS_BATCH_TOKENS = int(os.getenv("ANALYSIS_BATCH_TOKENS", "4000"))
+ANALYSIS_BATCH_MAX_LATENCY = float(os.getenv("ANALYSIS_BATCH_MAX_LATENCY", "20"))
+
+# Pré-triage local avant le LLM : score minimal et nombre max d'articles analysés (0 = illimité)
+TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "True") == "True"
+TRIAGE_MIN_SCORE = float(os.getenv("TRIAGE_MIN_SCORE", "0.25"))
+TRIAGE_TOP_N = int(os.getenv("TRIAGE_TOP_N", "0"))
+
+# Store des analyses déjà faites (par hash d'article + version des prompts)
+ENRICHMENT_STORE_PATH = DATA_DIR / "enrichment_store.json"
+ENRICHMENT_STORE_ENABLED = HTTP_STATEFUL
+ENRICHMENT_STORE_TTL_DAYS = float(os.getenv("ENRICHMENT_STORE_TTL_DAYS", "60"))
+
+# Journal de reprise de l'analyse (une ligne JSON par article enrichi),
+# distinct par mode HTTP : un record interrompu ne se reprend pas en replay
+ANALYSIS_CHECKPOINT_PATH = DATA_DIR / (
+    "analysis_checkpoint.jsonl" if HTTP_STATEFUL else f"analysis_checkpoint_{HTTP_MODE}.jsonl"
+)
+
+# Curateur : "compact" (pré-classement local + top-K au LLM), "full" (tout le corpus)
+# ou "local" (sélection MMR sans LLM) ; MMR_LAMBDA = pertinence vs diversité
+CURATOR_MODE = os.getenv("CURATOR_MODE", "compact")
+CURATOR_TOP_K = int(os.getenv("CURATOR_TOP_K", "25"))
+CURATOR_PROMPT_TOKENS = int(os.getenv("CURATOR_PROMPT_TOKENS", "3000"))
+CURATOR_RESUME_CHARS = int(os.getenv("CURATOR_RESUME_CHARS", "200"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+
+# Cache disque des réponses LLM : taille max (Mo) et durée de vie (jours)
+LLM_CACHE_ENABLED = HTTP_STATEFUL and os.getenv("LLM_CACHE_ENABLED", "True") == "True"
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", DATA_DIR / "llm_cache"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+# Rapport de run (télémétrie des appels LLM / TTS) et tarifs pour l'estimation
+# du coût ($ par million de tokens, $ par million de caractères synthétisés)
+RUN_REPORT_DIR = Path(os.getenv("RUN_REPORT_DIR", DATA_DIR / "run_reports"))
+LLM_PRICE_INPUT_PER_M = float(os.getenv("LLM_PRICE_INPUT_PER_M", "0.15"))
+LLM_PRICE_OUTPUT_PER_M = float(os.getenv("LLM_PRICE_OUTPUT_PER_M", "0.75"))
+TTS_PRICE_PER_M_CHARS = float(os.getenv("TTS_PRICE_PER_M_CHARS", "0"))
+
+# Mémo en mémoire des réponses LLM du process (nombre d'entrées, 0 = désactivé) ;
+# désactivé par défaut avec LLM_CACHE_ENABLED=False, pour forcer des générations neuves
+LLM_MEMO_SIZE = int(os.getenv("LLM_MEMO_SIZE", "256" if LLM_CACHE_ENABLED else "0"))
+
 # Dossier site statique
 SITE_DIR = DATA_DIR / "site"
 SITE_DIR.mkdir(exist_ok=True, parents=True)
 
+# Thème de la veille IA (thème par défaut, seul à passer par NewsAPI)
+IA_THEME = "intelligence artificielle"
+
 RSS_FEEDS = {
     "actualité": [
         "https://www.lemonde.fr/rss/une.xml",
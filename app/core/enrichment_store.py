@@ -0,0 +1,63 @@
+import hashlib
+import threading
+import time
+
+from app.core.config import ENRICHMENT_STORE_PATH, ENRICHMENT_STORE_TTL_DAYS
+from app.core.storage import read_json, write_json_atomic
+
+# Champs produits par l'analyse LLM (le reste vient de l'article collecté)
+FIELDS = ("resume", "sous_theme", "importance", "tags", "analyse")
+
+
+def input_digest(article: dict) -> str:
+    """Empreinte de ce que voit le LLM : si le flux modifie l'article, on ré-analyse."""
+    raw = "\n".join([article.get("titre", ""), article.get("source", ""), article.get("resume", "")])
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+class EnrichmentStore:
+    """
+    Résultats d'analyse LLM par hash d'article, persistants d'un run à l'autre.
+
+    Le store est lié à une version de prompt (hash des prompts d'agent_2) :
+    si les prompts changent, tout le store est invalidé au chargement.
+
+    Format de ENRICHMENT_STORE_PATH :
+    { "prompt_version": "...", "records": { hash: {"input", "updated", <FIELDS>} } }
+    """
+
+    def __init__(self, prompt_version: str, path=ENRICHMENT_STORE_PATH, ttl_days: float = ENRICHMENT_STORE_TTL_DAYS):
+        self.path = path
+        self.prompt_version = prompt_version
+        self._lock = threading.Lock()
+
+        data = read_json(path, {}) or {}
+        self.invalidated = bool(data) and data.get("prompt_version") != prompt_version
+        self._records = {} if self.invalidated else data.get("records", {})
+
+        limit = time.time() - ttl_days * 86400
+        self._records = {h: r for h, r in self._records.items() if r.get("updated", 0) >= limit}
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, article: dict):
+        """Article enrichi depuis le store, ou None (absent / article modifié)."""
+        rec = self._records.get(article.get("hash"))
+        if not rec or rec.get("input") != input_digest(article):
+            return None
+        enriched = dict(article)
+        enriched.update({k: rec[k] for k in FIELDS if k in rec})
+        return enriched
+
+    def put(self, article: dict, enriched: dict):
+        """article = version collectée (avant analyse), enriched = sortie de l'analyse."""
+        rec = {k: enriched[k] for k in FIELDS if k in enriched}
+        rec["input"] = input_digest(article)
+        rec["updated"] = int(time.time())
+        with self._lock:
+            self._records[article["hash"]] = rec
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(self.path, {"prompt_version": self.prompt_version, "records": self._records})
@@ -0,0 +1,70 @@
+import threading
+
+from app.core.config import FEED_CACHE_PATH
+from app.core.storage import read_json, write_json_atomic
+
+
+class FeedCache:
+    """
+    Cache disque des flux RSS (GET conditionnel).
+
+    Pour chaque URL on garde l'ETag, le Last-Modified et les articles déjà
+    parsés. Au run suivant on envoie If-None-Match / If-Modified-Since :
+    un 304 renvoie directement les articles du cache, sans re-parse.
+
+    Format de FEED_CACHE_PATH :
+    { url: {"etag", "last_modified", "entries": [...], "hits", "misses"} }
+    """
+
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._feeds = read_json(path, {}) or {}
+        # Compteurs du run courant : { url: {"hits": n, "misses": n} }
+        self.stats = {}
+
+    def conditional_headers(self, url: str) -> dict:
+        """En-têtes à ajouter à la requête pour un GET conditionnel."""
+        entry = self._feeds.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def has_entries(self, url: str) -> bool:
+        return url in self._feeds and "entries" in self._feeds[url]
+
+    def hit(self, url: str) -> list:
+        """Flux inchangé (304) : compte un hit et renvoie les articles en cache."""
+        with self._lock:
+            entry = self._feeds[url]
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._count(url, "hits")
+            return [dict(a) for a in entry.get("entries", [])]
+
+    def store(self, url: str, etag, last_modified, entries: list):
+        """Flux re-téléchargé (200) : compte un miss et mémorise la nouvelle version."""
+        with self._lock:
+            entry = self._feeds.setdefault(url, {})
+            entry["etag"] = etag
+            entry["last_modified"] = last_modified
+            entry["entries"] = entries
+            entry["misses"] = entry.get("misses", 0) + 1
+            self._count(url, "misses")
+
+    def _count(self, url: str, key: str):
+        counters = self.stats.setdefault(url, {"hits": 0, "misses": 0})
+        counters[key] += 1
+
+    def totals(self) -> dict:
+        """Totaux du run courant : {"hits": n, "misses": n}."""
+        return {
+            "hits": sum(c["hits"] for c in self.stats.values()),
+            "misses": sum(c["misses"] for c in self.stats.values()),
+        }
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(self.path, self._feeds)
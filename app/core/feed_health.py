@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import datetime
+
+from app.core.config import (
+    FEED_HEALTH_PATH,
+    FEED_TIMEOUT,
+    FEED_TIMEOUT_MIN,
+    FEED_BREAKER_THRESHOLD,
+    FEED_BREAKER_BACKOFF_HOURS,
+)
+from app.core.storage import read_json, write_json_atomic
+
+# Nombre de latences gardées par flux pour le calcul du p95
+LATENCY_WINDOW = 20
+# En dessous de ce nombre de mesures, on garde le timeout par défaut
+MIN_SAMPLES = 5
+# Marge appliquée au p95 observé pour fixer le timeout
+TIMEOUT_MARGIN = 1.5
+# Back-off max du disjoncteur : 7 jours
+MAX_BACKOFF = 7 * 86400
+
+
+def _p95(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+class FeedHealth:
+    """
+    Registre de santé des flux RSS, persistant d'un run à l'autre.
+
+    Pour chaque URL : latences récentes (succès uniquement), succès / échecs, échecs consécutifs,
+    nombre d'articles du dernier passage et état du disjoncteur.
+    - timeout_for : timeout adapté au p95 des latences observées
+    - is_open : disjoncteur ouvert → le flux est ignoré jusqu'à open_until
+      (back-off exponentiel après FEED_BREAKER_THRESHOLD échecs consécutifs)
+    """
+
+    def __init__(self, path=FEED_HEALTH_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._feeds = read_json(path, {}) or {}
+
+    def _state(self, url: str) -> dict:
+        return self._feeds.setdefault(url, {
+            "latencies": [],
+            "successes": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "last_entries": 0,
+            "total_entries": 0,
+            "last_error": None,
+            "last_success": None,
+            "open_until": 0,
+        })
+
+    def timeout_for(self, url: str) -> float:
+        latencies = (self._feeds.get(url) or {}).get("latencies", [])
+        if len(latencies) < MIN_SAMPLES:
+            return FEED_TIMEOUT
+        return min(FEED_TIMEOUT, max(FEED_TIMEOUT_MIN, _p95(latencies) * TIMEOUT_MARGIN))
+
+    def is_open(self, url: str, now: float = None) -> bool:
+        return (self._feeds.get(url) or {}).get("open_until", 0) > (now or time.time())
+
+    def record_success(self, url: str, latency: float, entries: int):
+        with self._lock:
+            state = self._state(url)
+            state["latencies"] = (state["latencies"] + [round(latency, 3)])[-LATENCY_WINDOW:]
+            state["successes"] += 1
+            state["consecutive_failures"] = 0
+            state["last_entries"] = entries
+            state["total_entries"] += entries
+            state["last_success"] = int(time.time())
+            state["open_until"] = 0
+
+    def record_failure(self, url: str, latency: float, error: str):
+        with self._lock:
+            # la latence d'un échec (souvent = timeout) n'entre pas dans le p95
+            state = self._state(url)
+            state["failures"] += 1
+            state["consecutive_failures"] += 1
+            state["last_entries"] = 0
+            state["last_error"] = str(error)[:200]
+
+            excess = state["consecutive_failures"] - FEED_BREAKER_THRESHOLD
+            if excess >= 0:
+                backoff = min(MAX_BACKOFF, FEED_BREAKER_BACKOFF_HOURS * 3600 * 2 ** excess)
+                state["open_until"] = int(time.time() + backoff)
+
+    def report(self) -> list:
+        """Une ligne par flux, les plus mal en point d'abord."""
+        now = time.time()
+        rows = []
+        for url, state in self._feeds.items():
+            total = state["successes"] + state["failures"]
+            latencies = state["latencies"]
+            rows.append({
+                "url": url,
+                "status": "ignoré" if state["open_until"] > now else ("KO" if state["consecutive_failures"] else "OK"),
+                "success_rate": round(state["successes"] / total, 2) if total else None,
+                "p95_latency": round(_p95(latencies), 2) if latencies else None,
+                "timeout": round(self.timeout_for(url), 1),
+                "consecutive_failures": state["consecutive_failures"],
+                "avg_entries": round(state["total_entries"] / state["successes"], 1) if state["successes"] else 0,
+                "open_until": (
+                    datetime.fromtimestamp(state["open_until"]).strftime("%Y-%m-%d %H:%M")
+                    if state["open_until"] > now else None
+                ),
+                "last_error": state["last_error"],
+            })
+        return sorted(rows, key=lambda r: (r["status"] == "OK", r["success_rate"] or 0, r["url"]))
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(self.path, self._feeds, indent=2)
+
+
+if __name__ == "__main__":
+    # python -m app.core.feed_health → rapport lisible de l'état des flux
+    for row in FeedHealth().report():
+        print(
+            f"{row['status']:7} {str(row['success_rate']):>5} "
+            f"p95={str(row['p95_latency']):>6}s timeout={row['timeout']:>5}s "
+            f"articles={row['avg_entries']:>5}  {row['url']}"
+            + (f"  (ignoré jusqu'au {row['open_until']})" if row["open_until"] else "")
+            + (f"  ← {row['last_error']}" if row["status"] != "OK" and row["last_error"] else "")
+        )
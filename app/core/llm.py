@@ -1,44 +1,672 @@
-import os
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from email.utils import parsedate_to_datetime
+
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from app.core import transport
+from app.core.config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_READ_TIMEOUT,
+    GROQ_MAX_RETRIES,
+    GROQ_BACKOFF_BASE,
+    GROQ_BACKOFF_MAX,
+    GROQ_POOL_SIZE,
+    LLM_CACHE_ENABLED,
+    LLM_MEMO_SIZE,
+    LLM_FAILOVER_RETRIES,
+)
+from app.core.llm_cache import LLMCache
+from app.core.memo import MemoLRU, SingleFlight
+from app.core.providers import build_providers
+from app.core.structured import parse_json, valider
+from app.core.telemetry import telemetry
+from app.core.logging_utils import setup_logger
+from app.core.tokens import estimate_tokens
+
+# Codes HTTP pour lesquels un nouvel essai a du sens
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+logger = setup_logger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Fournisseurs chat (Groq puis secours) ; le limiteur de Groq est partagé
+# par tous les appels du process (threads et asyncio)
+_providers = build_providers()
+_limiter = _providers.primary.limiter
+
+# Répétitions dans le process (mémo) et appels identiques simultanés (single-flight)
+_memo = MemoLRU(LLM_MEMO_SIZE)
+_flight = SingleFlight()
+
+JSON_FORMAT = {"type": "json_object"}
+
+REPAIR_PROMPT = """
+Ta réponse précédente est inutilisable : {erreur}.
+Renvoie UNIQUEMENT le JSON corrigé, au format demandé, sans texte autour.
+"""
+
+class LLMUnavailableError(RuntimeError):
+    """
+    Appel structuré sans réponse du fournisseur (réseau, HTTP), à distinguer
+    d'une réponse inutilisable. status : dernier statut HTTP (None sans réponse).
+    """
+
+    def __init__(self, message: str, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+# Appels structurés par étape : appels, cache, JSON illisibles, réparations…
+_structured_stats = defaultdict(Counter)
+_structured_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Cache disque des réponses LLM, créé au premier usage."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def llm_cache_stats() -> dict:
+    """Hits / misses / taux de hit / octets économisés depuis le début du run."""
+    return get_llm_cache().stats() if _cache is not None else {}
+
+
+def memo_stats() -> dict:
+    """Mémo en mémoire (hits, misses, taille) et appels partagés en vol."""
+    return {**_memo.stats(), "partages_en_vol": _flight.shared}
+
+
+def _get_session() -> requests.Session:
+    """Session HTTP partagée (keep-alive) : une seule poignée de main TLS par connexion."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=GROQ_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _parse_duration(value: str):
+    """'2', '7.66s', '2m59.56s', '120ms' → secondes (None si illisible)."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    factors = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * factors[unit] for n, unit in parts)
 
-load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
+def _retry_delay(response, attempt: int) -> float:
+    """
+    Attente avant le prochain essai : Retry-After / x-ratelimit-reset-* si le
+    serveur les donne, sinon back-off exponentiel avec jitter complet.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            delay = _parse_duration(retry_after)
+            if delay is None:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(GROQ_BACKOFF_MAX, max(0.0, delay))
 
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+        if response.status_code == 429:
+            resets = [
+                _parse_duration(response.headers.get(h))
+                for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+            ]
+            resets = [d for d in resets if d is not None]
+            if resets:
+                return min(GROQ_BACKOFF_MAX, max(resets))
 
+    return random.uniform(0, min(GROQ_BACKOFF_MAX, GROQ_BACKOFF_BASE * 2 ** attempt))
 
-def groq_chat(system_prompt: str, user_prompt: str, temperature=0.3, max_tokens=500):
-    """Appel GROQ fiable, robuste, compatible tous usages."""
 
+def groq_post(url: str, payload: dict, stream: bool = False, api_key: str = None, retries: int = None) -> requests.Response:
+    """
+    POST authentifié vers l'API Groq (chat, TTS…) ou un autre fournisseur
+    compatible OpenAI (api_key) :
+    connexions réutilisées, timeouts connect/read explicites, nouvel essai
+    sur erreur réseau, 429 et 5xx (GROQ_MAX_RETRIES, ou `retries`) ; une
+    cassette absente en mode replay est levée immédiatement.
+    Renvoie la dernière réponse reçue (à tester par l'appelant) ou lève
+    l'exception réseau du dernier essai.
+    """
     headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Authorization": f"Bearer {api_key or GROQ_API_KEY}",
         "Content-Type": "application/json",
     }
+    retries = GROQ_MAX_RETRIES if retries is None else retries
 
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            r = transport.request(
+                "POST", url,
+                headers=headers,
+                json=payload,
+                timeout=(GROQ_CONNECT_TIMEOUT, GROQ_READ_TIMEOUT),
+                stream=stream,
+                session=_get_session(),
+            )
+        except transport.CassetteMissError:
+            # replay : aucune cassette, un nouvel essai ne peut pas réussir
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            time.sleep(_retry_delay(None, attempt))
+            continue
+
+        if r.status_code not in RETRY_STATUSES or last:
+            return r
+        time.sleep(_retry_delay(r, attempt))
+        r.close()
+
+
+def _chat_payload(system_prompt: str, user_prompt: str, temperature, max_tokens, response_format=None, suite=()) -> dict:
+    """suite : messages supplémentaires après la question (échange de réparation)."""
     payload = {
         "model": GROQ_MODEL,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
+            *suite,
         ],
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    if response_format:
+        payload["response_format"] = response_format
+    return payload
+
+
+def _estimate_request_tokens(payload: dict) -> int:
+    """Tokens réservés dans le quota : prompt estimé + max_tokens de sortie."""
+    prompt = sum(estimate_tokens(m["content"]) for m in payload["messages"])
+    return prompt + payload.get("max_tokens", 0)
+
+
+def _failed_generation(r) -> str:
+    """Texte produit par le modèle mais refusé par le mode JSON du fournisseur."""
+    try:
+        error = r.json().get("error") or {}
+    except ValueError:
+        return ""
+    if error.get("code") != "json_validate_failed":
+        return ""
+    return error.get("failed_generation") or ""
+
+
+def _json_mode_refuse(r) -> bool:
+    """HTTP 400 : le fournisseur ne prend pas en charge response_format / json_object."""
+    try:
+        error = r.json().get("error") or {}
+    except ValueError:
+        return False
+    if not isinstance(error, dict) or error.get("code") == "json_validate_failed":
+        return False
+    message = str(error.get("message") or "").lower()
+    return error.get("param") == "response_format" or "response_format" in message or "json_object" in message
+
+
+def _chat_request(payload: dict, estimated: int, provider=None, retries: int = None,
+                  stage: str = "llm", queued: float = 0.0):
+    """
+    Appel HTTP du chat (quota déjà réservé) → (contenu, octets échangés, statut HTTP).
+    Fournisseur primaire par défaut ; le modèle du payload est celui du fournisseur.
+    Contenu vide en cas d'erreur ; statut None si aucune réponse reçue.
+    En mode JSON, un 400 "json_validate_failed" renvoie la génération
+    rejetée comme contenu, pour qu'elle puisse être réparée ; si le
+    fournisseur refuse response_format, le mode JSON est coupé pour lui seul
+    et l'appel repart aussitôt en texte libre.
+    Chaque appel est enregistré dans la télémétrie du run (queued : attente
+    dans le limiteur, en secondes).
+    """
+    provider = provider or _providers.primary
+    start = time.perf_counter()
+    content, upstream_bytes, status, usage = _chat_http(payload, estimated, provider, retries, stage)
+    telemetry.record(
+        "chat", stage, provider.name, status, time.perf_counter() - start, queued,
+        usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+    )
+    return content, upstream_bytes, status
 
+
+def _chat_http(payload: dict, estimated: int, provider, retries, stage):
+    """→ (contenu, octets, statut, bloc usage)."""
+    payload = {**payload, "model": provider.model}
+    if not provider.json_mode:
+        payload.pop("response_format", None)
+    status = None
     try:
-        r = requests.post(GROQ_URL, headers=headers, json=payload)
+        r = groq_post(provider.chat_url, payload, api_key=provider.api_key, retries=retries)
+        status = r.status_code
+        if status == 400 and payload.get("response_format"):
+            failed = _failed_generation(r)
+            if failed:
+                return failed, len(r.content), status, {}
+            if _json_mode_refuse(r):
+                provider.json_mode = False
+                logger.warning("⚠️ Mode JSON refusé par %s, repli en texte libre", provider.name)
+                provider.limiter.release(estimated)
+                provider.limiter.acquire(estimated)
+                return _chat_http(payload, estimated, provider, retries, stage)
         r.raise_for_status()
     except Exception as e:
-        print("❌ Erreur API GROQ :", e)
-        print("Payload envoyé :", payload)
-        return ""
+        logger.error("❌ Erreur API %s (%s) : %s", provider.name, stage, e)
+        provider.limiter.release(estimated)
+        return "", 0, status, {}
 
     data = r.json()
+    usage = data.get("usage") or {}
+    provider.limiter.reconcile(estimated, usage.get("total_tokens", 0))
 
     try:
-        return data["choices"][0]["message"]["content"]
-    except:
-        return ""
+        content = data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        logger.error("❌ Réponse %s sans contenu (%s)", provider.name, stage)
+        return "", 0, status, usage
+
+    # octets économisés à chaque hit de cache : requête envoyée + réponse reçue
+    return content, len(json.dumps(payload).encode("utf-8")) + len(r.content), status, usage
+
+
+def _call(payload: dict, stage: str = "llm"):
+    """
+    Appel chat via les fournisseurs (quota réservé, hedge, bascule)
+    → (contenu, octets, statut).
+    """
+    estimated = _estimate_request_tokens(payload)
+    return _providers.call(
+        payload, estimated,
+        lambda provider, payload, estimated, retries, queued: _chat_request(
+            payload, estimated, provider, retries, stage, queued,
+        ),
+    )
+
+
+def _chat_upstream(key, system_prompt, user_prompt, temperature, max_tokens, disk: bool, stage: str = "llm") -> str:
+    """Cache disque puis appel réel."""
+    if disk:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+    payload = _chat_payload(system_prompt, user_prompt, temperature, max_tokens)
+    content, upstream_bytes, _ = _call(payload, stage)
+    if disk and content:
+        get_llm_cache().put(key, content, upstream_bytes=upstream_bytes)
+    return content
+
+
+def groq_chat(system_prompt: str, user_prompt: str, temperature=0.3, max_tokens=500, cache: bool = True,
+              stage: str = "llm"):
+    """
+    Appel GROQ fiable, robuste, compatible tous usages.
+    cache=False force un appel réel (et n'enregistre pas la réponse).
+    Ordre de résolution : mémo du process, appel identique déjà en vol
+    (on attend son résultat), cache disque, puis appel réel, qui attend son
+    tour dans le limiteur partagé (requêtes + tokens/minute).
+    stage : étape appelante, pour la télémétrie.
+    """
+    if not cache:
+        return _chat_upstream(None, system_prompt, user_prompt, temperature, max_tokens, disk=False, stage=stage)
+
+    key = LLMCache.key(GROQ_MODEL, system_prompt, user_prompt, temperature, max_tokens)
+    content = _memo.get(key)
+    if content is None:
+        content = _flight.do(key, lambda: _chat_upstream(
+            key, system_prompt, user_prompt, temperature, max_tokens, disk=LLM_CACHE_ENABLED, stage=stage,
+        ))
+        if content:
+            _memo.put(key, content)
+    return content
+
+
+async def agroq_chat(system_prompt: str, user_prompt: str, temperature=0.3, max_tokens=500, cache: bool = True,
+                     stage: str = "llm"):
+    """
+    Variante asynchrone de groq_chat, même limiteur partagé et même mémo
+    (pas de single-flight : l'attente bloquerait la boucle).
+    L'attente de quota est un asyncio.sleep (ne bloque pas la boucle) ;
+    l'appel HTTP lui-même tourne dans un thread.
+    """
+    key = LLMCache.key(GROQ_MODEL, system_prompt, user_prompt, temperature, max_tokens)
+    if cache:
+        memo = _memo.get(key)
+        if memo is not None:
+            return memo
+
+    use_cache = cache and LLM_CACHE_ENABLED
+    if use_cache:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            _memo.put(key, cached)
+            return cached
+
+    payload = _chat_payload(system_prompt, user_prompt, temperature, max_tokens)
+    estimated = _estimate_request_tokens(payload)
+    queued = await _limiter.acquire_async(estimated)
+
+    content, upstream_bytes, _ = await asyncio.to_thread(
+        _chat_request, payload, estimated, None, None, stage, queued,
+    )
+    if use_cache and content:
+        get_llm_cache().put(key, content, upstream_bytes=upstream_bytes)
+    if cache and content:
+        _memo.put(key, content)
+    return content
+
+
+def _sse_events(r):
+    """Événements JSON d'un flux SSE OpenAI ("data: {...}" … "data: [DONE]")."""
+    r.encoding = "utf-8"  # SSE : toujours UTF-8, quel que soit le Content-Type
+    for line in r.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def _open_stream(payload: dict, estimated: int, stage: str):
+    """
+    Ouvre le flux SSE sur le premier fournisseur qui répond 200 (bascule
+    avant le premier morceau, pas de hedge)
+    → (réponse, fournisseur, attente limiteur, début) ou (None, None, 0, 0).
+    """
+    providers = _providers.providers
+    for i, provider in enumerate(providers):
+        last = i == len(providers) - 1
+        queued = provider.limiter.acquire(estimated)
+        start = time.perf_counter()
+        status = None
+        try:
+            r = groq_post(
+                provider.chat_url, {**payload, "model": provider.model}, stream=True,
+                api_key=provider.api_key, retries=None if last else LLM_FAILOVER_RETRIES,
+            )
+            status = r.status_code
+            if status == 200:
+                return r, provider, queued, start
+            logger.error("❌ Erreur API %s (flux, %s) : %s %s", provider.name, stage, status, r.text)
+            r.close()
+        except Exception as e:
+            logger.error("❌ Erreur API %s (flux, %s) : %s", provider.name, stage, e)
+        provider.limiter.release(estimated)
+        telemetry.record("chat", stage, provider.name, status, time.perf_counter() - start, queued, flux=True)
+    return None, None, 0.0, 0.0
+
+
+def groq_chat_stream(system_prompt: str, user_prompt: str, temperature=0.3, max_tokens=500, cache: bool = True,
+                     stage: str = "llm"):
+    """
+    Variante en flux (SSE) de groq_chat : itérateur des morceaux de texte,
+    au fil de la génération.
+    Un hit (mémo ou cache disque) renvoie la réponse en un seul morceau ;
+    seule une réponse lue jusqu'au bout est mise en cache. En cas d'erreur,
+    le flux s'arrête (éventuellement après une sortie partielle).
+    """
+    key = LLMCache.key(GROQ_MODEL, system_prompt, user_prompt, temperature, max_tokens)
+    if cache:
+        memo = _memo.get(key)
+        if memo is not None:
+            yield memo
+            return
+
+    use_cache = cache and LLM_CACHE_ENABLED
+    if use_cache:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            _memo.put(key, cached)
+            yield cached
+            return
+
+    payload = _chat_payload(system_prompt, user_prompt, temperature, max_tokens)
+    payload["stream"] = True
+    estimated = _estimate_request_tokens(payload)
+
+    r, provider, queued, start = _open_stream(payload, estimated, stage)
+    if r is None:
+        return
+
+    with r:
+        parts = []
+        usage = {}
+        first = None
+        try:
+            for event in _sse_events(r):
+                # Groq : usage dans x_groq du dernier morceau ; OpenAI : "usage"
+                usage = event.get("usage") or (event.get("x_groq") or {}).get("usage") or usage
+                for choice in event.get("choices") or []:
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        if first is None:
+                            first = time.perf_counter() - start
+                        parts.append(delta)
+                        yield delta
+        except requests.RequestException as e:
+            logger.error("❌ Flux %s interrompu (%s) : %s", provider.name, stage, e)
+            return
+        finally:
+            provider.limiter.reconcile(estimated, usage.get("total_tokens", 0))
+            telemetry.record(
+                "chat", stage, provider.name, r.status_code, time.perf_counter() - start, queued,
+                usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                flux=True, premier_morceau_s=round(first, 3) if first is not None else None,
+            )
+
+    content = "".join(parts)
+    if use_cache and content:
+        upstream_bytes = len(json.dumps(payload).encode("utf-8")) + len(content.encode("utf-8"))
+        get_llm_cache().put(key, content, upstream_bytes=upstream_bytes)
+    if cache and content:
+        _memo.put(key, content)
+
+
+_FIN_PHRASE_RE = re.compile(r"(?<=[.!?…])[\"»)]*\s+")
+
+
+def phrases(morceaux, min_chars: int = 0):
+    """
+    Regroupe un flux de morceaux de texte en phrases complètes (utilisable
+    dès qu'elles sont terminées). min_chars : on accumule les phrases
+    jusqu'à cette longueur avant de les rendre. Le reste est rendu à la fin.
+    """
+    buffer = ""
+    for morceau in morceaux:
+        buffer += morceau
+        while True:
+            fins = [m.end() for m in _FIN_PHRASE_RE.finditer(buffer) if m.end() >= min_chars]
+            if not fins:
+                break
+            cut = fins[0]
+            phrase, buffer = buffer[:cut].strip(), buffer[cut:]
+            if phrase:
+                yield phrase
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _compter(stage: str, *events):
+    with _structured_lock:
+        _structured_stats[stage].update(events)
+
+
+def _structured_call(system_prompt, user_prompt, temperature, max_tokens, stage, suite=()):
+    """
+    Appel en mode JSON natif ; chaque fournisseur qui refuse response_format
+    repasse en texte libre (voir _chat_http). LLMUnavailableError sans réponse.
+    """
+    payload = _chat_payload(system_prompt, user_prompt, temperature, max_tokens, JSON_FORMAT, suite)
+    content, upstream_bytes, status = _call(payload, stage)
+    if not content:
+        _compter(stage, "erreurs_api")
+        raise LLMUnavailableError(f"aucune réponse du fournisseur ({stage}, HTTP {status})", status)
+    return content, upstream_bytes
+
+
+def groq_chat_json(system_prompt: str, user_prompt: str, schema, temperature=0.3, max_tokens=500,
+                   stage: str = "llm", cache: bool = True, raise_on_error: bool = False):
+    """
+    Appel structuré : renvoie l'objet JSON décodé et conforme à `schema`
+    (voir app/core/structured.py), ou None.
+    - mode JSON natif (response_format) tant que le fournisseur l'accepte
+    - si la réponse est illisible ou hors schéma : UNE relance de réparation
+      qui renvoie au modèle sa réponse et l'erreur précise
+    - seules les réponses valides sont mises en cache (mémo et disque) ;
+      les appels identiques simultanés partagent un seul appel
+    - sans réponse du fournisseur : None, ou LLMUnavailableError avec
+      raise_on_error (l'appelant distingue une panne d'une réponse illisible)
+    Compteurs par étape : voir structured_stats().
+    """
+    _compter(stage, "appels")
+    try:
+        if not cache:
+            text = _chat_json_upstream(
+                None, system_prompt, user_prompt, schema, temperature, max_tokens, stage, disk=False,
+            )
+            return json.loads(text) if text else None
+
+        key = LLMCache.key(GROQ_MODEL, system_prompt, user_prompt, temperature, max_tokens, JSON_FORMAT)
+        text = _memo.get(key)
+        if text is not None:
+            _compter(stage, "memo")
+        else:
+            text = _flight.do(key, lambda: _chat_json_upstream(
+                key, system_prompt, user_prompt, schema, temperature, max_tokens, stage, disk=LLM_CACHE_ENABLED,
+            ))
+            if text:
+                _memo.put(key, text)
+    except LLMUnavailableError:
+        if raise_on_error:
+            raise
+        return None
+    # texte JSON partagé, objet neuf pour chaque appelant
+    return json.loads(text) if text else None
+
+
+def _chat_json_upstream(key, system_prompt, user_prompt, schema, temperature, max_tokens, stage, disk: bool):
+    """
+    Cache disque puis appel réel (+ réparation) → texte JSON valide, ou None
+    si la réponse reste inutilisable ; LLMUnavailableError sans réponse.
+    """
+    if disk:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            _compter(stage, "cache")
+            return cached
+
+    content, upstream_bytes = _structured_call(system_prompt, user_prompt, temperature, max_tokens, stage)
+
+    data, erreur = _decoder(content, schema)
+    if erreur:
+        _compter(stage, "json_invalides")
+        suite = (
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": REPAIR_PROMPT.format(erreur=erreur)},
+        )
+        content, repair_bytes = _structured_call(system_prompt, user_prompt, temperature, max_tokens, stage, suite)
+        upstream_bytes += repair_bytes
+        data, erreur = _decoder(content, schema)
+        if erreur:
+            _compter(stage, "echecs")
+            logger.error("❌ JSON LLM inutilisable (%s) après réparation : %s", stage, erreur)
+            return None
+        _compter(stage, "reparations")
+
+    text = json.dumps(data, ensure_ascii=False)
+    if disk:
+        get_llm_cache().put(key, text, upstream_bytes=upstream_bytes)
+    return text
+
+
+def _decoder(content: str, schema):
+    """→ (données, None) si valide, sinon (None, message d'erreur)."""
+    try:
+        data = parse_json(content)
+    except ValueError as e:
+        return None, str(e)
+    erreur = valider(data, schema)
+    return (None, erreur) if erreur else (data, None)
+
+
+def structured_stats() -> dict:
+    """Compteurs des appels structurés, par étape."""
+    with _structured_lock:
+        return {stage: dict(c) for stage, c in _structured_stats.items()}
+
+
+def rate_limiter_stats() -> dict:
+    """Appels, attentes et profondeur de file du limiteur Groq."""
+    return _limiter.stats()
+
+
+def providers_stats() -> dict:
+    """Appels, erreurs, p95 par fournisseur ; hedges et bascules."""
+    return _providers.report()
+
+
+def reset_llm_stats():
+    """
+    Début d'un run : compteurs du cache, du mémo, du limiteur, des
+    fournisseurs et des appels structurés remis à zéro. Contenus des caches
+    et latences observées (hedge) sont conservés.
+    """
+    if _cache is not None:
+        _cache.reset_stats()
+    _memo.reset_stats()
+    _flight.reset_stats()
+    _providers.reset_stats()
+    with _structured_lock:
+        _structured_stats.clear()
+
+
+def verifier_fournisseurs() -> list:
+    """
+    Un petit appel par fournisseur configuré, sans cache, hedge ni bascule
+    (à lancer contre un serveur local de test) → [(nom, statut HTTP, secondes)].
+    """
+    results = []
+    for provider in _providers.providers:
+        payload = _chat_payload("Réponds OK.", "ping", 0, 5)
+        estimated = _estimate_request_tokens(payload)
+        provider.limiter.acquire(estimated)
+        start = time.perf_counter()
+        _, _, status = _chat_request(payload, estimated, provider, retries=0, stage="verification")
+        results.append((provider.name, status, time.perf_counter() - start))
+    return results
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.core.config import LLM_CACHE_DIR, LLM_CACHE_MAX_MB, LLM_CACHE_TTL_DAYS
+from app.core.storage import read_json, write_json_atomic
+
+
+class LLMCache:
+    """
+    Cache disque des réponses LLM, adressé par le contenu de la requête.
+
+    Une entrée = un fichier JSON <dir>/<2 premiers car.>/<sha256>.json.
+    - TTL : une entrée plus vieille que ttl_days est ignorée puis supprimée
+    - LRU : chaque hit rafraîchit la date de modification du fichier ; au-delà
+      de max_mb on supprime les fichiers les moins récemment utilisés
+    """
+
+    def __init__(self, directory=LLM_CACHE_DIR, max_mb: float = LLM_CACHE_MAX_MB, ttl_days: float = LLM_CACHE_TTL_DAYS):
+        self.dir = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl = ttl_days * 86400
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._size = sum(p.stat().st_size for p in self.dir.glob("*/*.json"))
+
+    @staticmethod
+    def key(model: str, system_prompt: str, user_prompt: str, temperature, max_tokens, response_format=None) -> str:
+        parts = [model, system_prompt, user_prompt, temperature, max_tokens]
+        if response_format:
+            parts.append(response_format)
+        canonical = json.dumps(parts, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str):
+        return self.dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        """Contenu en cache ou None (absent / expiré)."""
+        path = self._path(key)
+        entry = read_json(path)
+
+        with self._lock:
+            if entry is None or time.time() - entry.get("created", 0) > self.ttl:
+                self.misses += 1
+                if entry is not None:
+                    self._remove(path)
+                return None
+            self.hits += 1
+            self.bytes_saved += entry.get("bytes", 0)
+
+        try:
+            os.utime(path)  # LRU : dernière utilisation = mtime
+        except OSError:
+            pass
+        return entry["content"]
+
+    def put(self, key: str, content: str, upstream_bytes: int = 0):
+        """Enregistre une réponse ; upstream_bytes = trafic évité à chaque hit."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        with self._lock:
+            # une entrée remplacée (écritures simultanées, entrée expirée)
+            # ne compte que pour la différence de taille
+            try:
+                old_size = path.stat().st_size
+            except OSError:
+                old_size = 0
+            write_json_atomic(path, {"created": time.time(), "bytes": upstream_bytes, "content": content})
+            self._size += path.stat().st_size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            self._size -= size
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Supprime les entrées expirées puis les moins récemment utilisées (sous verrou)."""
+        files = []
+        for path in self.dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        now = time.time()
+        files.sort()
+        self._size = sum(size for _, size, _ in files)
+        # 10 % de marge pour ne pas évincer à chaque écriture
+        target = self.max_bytes * 0.9
+        for mtime, size, path in files:
+            if self._size <= target and now - mtime <= self.ttl:
+                continue
+            self._remove(path)
+
+    def reset_stats(self):
+        """Compteurs remis à zéro (début d'un run) ; les entrées restent."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "size_bytes": self._size,
+        }
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class MemoLRU:
+    """
+    Mémo en mémoire, borné : les `size` dernières réponses du process.
+    Répond aux répétitions sans disque ni réseau (size=0 : désactivé).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "taille": len(self._data)}
+
+
+class SingleFlight:
+    """
+    Regroupement des appels identiques en vol : le premier appelant d'une
+    clé exécute la fonction, les suivants attendent et reçoivent le même
+    résultat (ou la même exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.shared = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,135 @@
+import hashlib
+import random
+import re
+import unicodedata
+from collections import defaultdict
+
+from app.core.config import NEAR_DUP_THRESHOLD
+
+# MinHash : 32 permutations découpées en 16 bandes de 2 lignes.
+# Deux textes de Jaccard J partagent au moins une bande avec une proba
+# 1 - (1 - J²)^16 : ~99,8 % pour J = 0.6, ~0 % pour J < 0.1.
+NUM_PERM = 32
+ROWS = 2
+BANDS = NUM_PERM // ROWS
+
+_MASK = (1 << 64) - 1
+_rng = random.Random(42)  # graines fixes → signatures reproductibles
+_SALTS = [(_rng.getrandbits(64), _rng.getrandbits(64) | 1) for _ in range(NUM_PERM)]
+
+# Un titre identique d'au moins TITLE_MIN_WORDS mots suffit à signaler une reprise,
+# même si la source a réécrit le chapeau.
+TITLE_MIN_WORDS = 5
+
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is",
+    "are", "was", "its", "it", "by", "at", "as", "from", "that", "this", "be",
+    "le", "la", "les", "un", "une", "des", "de", "du", "et", "ou", "en", "au",
+    "aux", "pour", "par", "sur", "dans", "est", "sont", "que", "qui", "ce",
+}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> list:
+    """Texte → liste de mots (minuscules, sans accents, sans HTML ni mots vides)."""
+    text = _TAG_RE.sub(" ", text or "")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens: set) -> tuple:
+    """Signature MinHash (NUM_PERM valeurs) d'un ensemble de mots."""
+    hashes = [_token_hash(t) for t in tokens]
+    return tuple(min(((h ^ salt) * mult) & _MASK for h in hashes) for salt, mult in _SALTS)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _richness(article: dict):
+    """Plus le score est grand, plus l'article est complet (on garde celui-là)."""
+    return (
+        len(article.get("resume") or ""),
+        1 if article.get("image") else 0,
+        len(article.get("titre") or ""),
+    )
+
+
+def cluster_near_duplicates(articles: list, threshold: float = NEAR_DUP_THRESHOLD) -> list:
+    """
+    Regroupe les quasi-doublons (même dépêche reprise par plusieurs sources).
+
+    MinHash-LSH sur les mots de titre + résumé : on ne compare que les
+    articles qui tombent dans un même seau (bande de signature ou titre
+    identique), puis on vérifie avec le vrai Jaccard → coût quasi linéaire.
+
+    Renvoie une liste de clusters (listes d'indices), dans l'ordre d'apparition.
+    """
+    n = len(articles)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if threshold > 0 and n > 1:
+        titles = [set(normalize(a.get("titre", ""))) for a in articles]
+        tokens = [titles[i] | set(normalize(a.get("resume", ""))) for i, a in enumerate(articles)]
+
+        def similar(i, j):
+            if len(titles[i]) >= TITLE_MIN_WORDS and titles[i] == titles[j]:
+                return True
+            return jaccard(tokens[i], tokens[j]) >= threshold
+
+        buckets = defaultdict(list)
+        for i in range(n):
+            # Articles trop courts : similarité non significative, on ne les regroupe pas
+            if len(tokens[i]) < 4:
+                continue
+            sig = minhash(tokens[i])
+            keys = [(b, sig[b * ROWS:(b + 1) * ROWS]) for b in range(BANDS)]
+            if len(titles[i]) >= TITLE_MIN_WORDS:
+                keys.append(("titre", tuple(sorted(titles[i]))))
+
+            candidates = {j for key in keys for j in buckets[key]}
+            for j in sorted(candidates):
+                if find(i) != find(j) and similar(i, j):
+                    parent[find(i)] = find(j)
+            for key in keys:
+                buckets[key].append(i)
+
+    clusters = defaultdict(list)
+    for i in range(n):
+        clusters[find(i)].append(i)
+    return sorted(clusters.values(), key=lambda c: c[0])
+
+
+def merge_near_duplicates(articles: list, threshold: float = NEAR_DUP_THRESHOLD) -> list:
+    """
+    Ne garde que l'article le plus riche de chaque cluster, à la place du
+    premier membre du cluster. Les autres sont conservés comme
+    "sources_alternatives" (source, url, hash) de l'article gardé.
+    """
+    merged = []
+    for cluster in cluster_near_duplicates(articles, threshold):
+        best = max(cluster, key=lambda i: (_richness(articles[i]), -i))
+        kept = dict(articles[best])
+        others = [articles[i] for i in cluster if i != best]
+        if others:
+            kept["sources_alternatives"] = [
+                {"source": o.get("source", ""), "url": o.get("url", ""), "hash": o.get("hash", "")}
+                for o in others
+            ]
+        merged.append(kept)
+    return merged
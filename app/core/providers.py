@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.core.config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GROQ_MODEL,
+    GROQ_RPM,
+    GROQ_TPM,
+    GROQ_RATE_HEADROOM,
+    GROQ_POOL_SIZE,
+    LLM_FALLBACK_PROVIDERS,
+    LLM_FAILOVER_RETRIES,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_JSON_MODE,
+)
+from app.core.logging_utils import setup_logger
+from app.core.rate_limiter import RateLimiter
+
+logger = setup_logger(__name__)
+
+# Statuts pour lesquels on passe au fournisseur suivant : le problème vient du
+# fournisseur (quota, panne, clé refusée), pas de la requête elle-même
+FAILOVER_STATUSES = {401, 403, 404, 408, 409, 429, 500, 502, 503, 504}
+
+# Latences conservées par fournisseur et par taille d'appel
+LATENCY_WINDOW = 200
+
+
+class Provider:
+    """
+    Un point d'accès chat compatible OpenAI : URL, modèle, clé, quotas propres.
+    json_mode : mode JSON natif (response_format) accepté, coupé pour ce seul
+    fournisseur s'il le refuse.
+    Les latences des appels réussis sont gardées par « taille » d'appel
+    (ordre de grandeur de max_tokens) pour estimer un p95 comparable.
+    """
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: str = None,
+                 rpm: float = 0, tpm: float = 0, limiter: RateLimiter = None):
+        self.name = name
+        self.chat_url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.limiter = limiter or RateLimiter(rpm, tpm, GROQ_RATE_HEADROOM)
+        self.json_mode = LLM_JSON_MODE
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    @staticmethod
+    def bucket(payload: dict) -> int:
+        return int(payload.get("max_tokens") or 0).bit_length()
+
+    def record(self, bucket: int, seconds: float, ok: bool):
+        with self._lock:
+            self.stats["appels"] += 1
+            if not ok:
+                self.stats["erreurs"] += 1
+                return
+            self._latencies.setdefault(bucket, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def p95(self, bucket: int):
+        """p95 des latences observées (None tant qu'il y a trop peu d'appels)."""
+        with self._lock:
+            values = sorted(self._latencies.get(bucket, ()))
+        if len(values) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+    def reset_stats(self):
+        """Compteurs remis à zéro (début d'un run) ; les latences servent encore au hedge."""
+        with self._lock:
+            self.stats.clear()
+        self.limiter.reset_stats()
+
+    def report(self) -> dict:
+        with self._lock:
+            p95 = {
+                b: round(sorted(v)[min(len(v) - 1, int(0.95 * len(v)))], 2)
+                for b, v in self._latencies.items() if v
+            }
+        return {**self.stats, "p95_s": p95, "json_mode": self.json_mode}
+
+
+class ProviderPool:
+    """
+    Liste ordonnée de fournisseurs.
+    - hedge : si le fournisseur tarde au-delà de son p95 observé, un doublon
+      part vers le fournisseur suivant (ou le même s'il est seul) ; la première
+      réponse utilisable gagne, l'autre est ignorée
+    - bascule : sur erreur côté fournisseur (réseau, 429, 5xx, clé refusée),
+      on passe au suivant, avec moins de nouveaux essais tant qu'il en reste un
+    """
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=GROQ_POOL_SIZE * 2, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def call(self, payload: dict, estimated: int, request):
+        """
+        request(provider, payload, estimated, retries, queued) → (contenu, octets, statut),
+        appelé quota déjà réservé (queued : secondes d'attente dans le limiteur). Renvoie le premier résultat utilisable,
+        sinon celui du dernier fournisseur essayé.
+        """
+        bucket = Provider.bucket(payload)
+        for i, provider in enumerate(self.providers):
+            last = i == len(self.providers) - 1
+            retries = None if last else LLM_FAILOVER_RETRIES
+            hedge_to = provider if last else self.providers[i + 1]
+
+            result = self._hedged(provider, hedge_to, bucket, payload, estimated, retries, request)
+            content, _, status = result
+            if content or (status is not None and status not in FAILOVER_STATUSES):
+                return result
+            if not last:
+                self.stats["bascules"] += 1
+                logger.warning("↪️ %s en échec (HTTP %s) → bascule sur %s", provider.name, status, self.providers[i + 1].name)
+        return result
+
+    def _attempt(self, provider, bucket, payload, estimated, retries, request, queued=None):
+        if queued is None:
+            queued = provider.limiter.acquire(estimated)
+        start = time.perf_counter()
+        result = request(provider, payload, estimated, retries, queued)
+        provider.record(bucket, time.perf_counter() - start, bool(result[0]))
+        return result
+
+    def _hedged(self, provider, hedge_to, bucket, payload, estimated, retries, request):
+        delay = provider.p95(bucket) if LLM_HEDGE_ENABLED else None
+        if delay is None:
+            return self._attempt(provider, bucket, payload, estimated, retries, request)
+
+        queued = provider.limiter.acquire(estimated)
+        pool = self._executor()
+        first = pool.submit(self._attempt, provider, bucket, payload, estimated, retries, request, queued)
+        done, _ = wait([first], timeout=max(delay, LLM_HEDGE_MIN_DELAY))
+        if done:
+            return first.result()
+
+        self.stats["hedges"] += 1
+        hedge = pool.submit(self._attempt, hedge_to, bucket, payload, estimated, retries, request)
+        pending = {first, hedge}
+        result = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result[0]:
+                    if future is hedge:
+                        self.stats["hedges_gagnes"] += 1
+                    return result
+        return result
+
+    def reset_stats(self):
+        self.stats.clear()
+        for provider in self.providers:
+            provider.reset_stats()
+
+    def report(self) -> dict:
+        return {"pool": dict(self.stats), **{p.name: p.report() for p in self.providers}}
+
+
+def _fallback_configs(raw: str) -> list:
+    """
+    Fournisseurs de secours depuis LLM_FALLBACK_PROVIDERS (liste JSON).
+    Valeur illisible : ignorée en entier ; entrée sans base_url : ignorée seule.
+    """
+    if not raw.strip():
+        return []
+    try:
+        confs = json.loads(raw)
+    except ValueError as e:
+        logger.warning("⚠️ LLM_FALLBACK_PROVIDERS illisible, ignoré : %s", e)
+        return []
+    if not isinstance(confs, list):
+        logger.warning("⚠️ LLM_FALLBACK_PROVIDERS doit être une liste JSON, ignoré")
+        return []
+
+    valid = []
+    for i, conf in enumerate(confs):
+        if not isinstance(conf, dict) or not conf.get("base_url"):
+            logger.warning("⚠️ LLM_FALLBACK_PROVIDERS[%d] sans base_url, ignoré", i)
+            continue
+        valid.append(conf)
+    return valid
+
+
+def build_providers() -> ProviderPool:
+    """Groq (GROQ_*) en tête, puis LLM_FALLBACK_PROVIDERS dans l'ordre."""
+    providers = [Provider("groq", GROQ_BASE_URL, GROQ_MODEL, GROQ_API_KEY, GROQ_RPM, GROQ_TPM)]
+    for i, conf in enumerate(_fallback_configs(LLM_FALLBACK_PROVIDERS)):
+        providers.append(Provider(
+            conf.get("name") or f"secours_{i + 1}",
+            conf["base_url"],
+            conf.get("model") or GROQ_MODEL,
+            os.getenv(conf["api_key_env"]) if conf.get("api_key_env") else conf.get("api_key"),
+            conf.get("rpm", 0),
+            conf.get("tpm", 0),
+        ))
+    return ProviderPool(providers)
+
+
+if __name__ == "__main__":
+    # Vérification des fournisseurs configurés (un petit appel chacun) :
+    #   GROQ_BASE_URL=http://127.0.0.1:8000/v1 python -m app.core.providers
+    from app.core.llm import verifier_fournisseurs
+
+    for name, status, seconds in verifier_fournisseurs():
+        print(f"{'✅' if status == 200 else '❌'} {name:<20} HTTP {status}  {seconds:.2f}s")
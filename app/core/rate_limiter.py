@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Seau à jetons « à crédit » : un appel prend ses jetons immédiatement,
+    quitte à rendre le niveau négatif, et attend le temps de le rembourser.
+    Les appelants sont donc servis dans l'ordre d'arrivée, sans boucle d'attente.
+    """
+
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.rate = per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float, now: float) -> float:
+        """Prélève `amount` jetons, renvoie l'attente nécessaire (secondes)."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def give_back(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Limiteur partagé requêtes/minute + tokens/minute (quotas Groq).
+
+    Les deux seaux sont dimensionnés à `headroom` x quota pour rester juste
+    sous la limite. Utilisable depuis des threads (acquire) comme depuis
+    asyncio (acquire_async). rpm / tpm à 0 = pas de limite.
+    """
+
+    def __init__(self, rpm: float, tpm: float, headroom: float = 0.9):
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm * headroom, rpm * headroom / 60) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm * headroom, tpm * headroom / 60) if tpm > 0 else None
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self._requests:
+                wait = max(wait, self._requests.take(1, now))
+            if self._tokens:
+                wait = max(wait, self._tokens.take(tokens, now))
+
+            self.calls += 1
+            if wait > 0:
+                self.waited_calls += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            return wait
+
+    def _release_queue(self):
+        with self._lock:
+            self.queue_depth -= 1
+
+    def acquire(self, tokens: int) -> float:
+        """Bloque jusqu'à ce que la requête (tokens estimés) rentre dans le quota."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+            self._release_queue()
+        return wait
+
+    async def acquire_async(self, tokens: int) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            self._release_queue()
+        return wait
+
+    def reconcile(self, estimated: int, actual: int):
+        """Corrige le seau de tokens avec la consommation réelle (champ usage)."""
+        if not self._tokens or not actual:
+            return
+        with self._lock:
+            self._tokens.give_back(estimated - actual, time.monotonic())
+
+    def reset_stats(self):
+        """Compteurs remis à zéro (début d'un run) ; les seaux ne bougent pas."""
+        with self._lock:
+            self.calls = 0
+            self.waited_calls = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.max_queue_depth = self.queue_depth
+
+    def release(self, estimated: int):
+        """
+        Rend les tokens réservés d'un appel resté sans réponse (erreur réseau
+        ou HTTP) : rien n'a été consommé côté fournisseur.
+        """
+        if not self._tokens:
+            return
+        with self._lock:
+            self._tokens.give_back(min(estimated, self._tokens.capacity), time.monotonic())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "total_wait_s": round(self.total_wait, 2),
+                "avg_wait_s": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+                "max_wait_s": round(self.max_wait, 2),
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+            }
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from app.core.config import SEEN_INDEX_PATH, SEEN_WINDOW_DAYS
+from app.core.storage import read_json, write_json_atomic
+
+# On ne garde que les 16 premiers caractères du hash MD5 (64 bits) :
+# largement suffisant pour quelques milliers d'articles, index 2x plus petit.
+KEY_LEN = 16
+
+
+class SeenIndex:
+    """
+    Index persistant des articles déjà traités d'un run à l'autre.
+
+    Format de SEEN_INDEX_PATH : { hash_court: timestamp_premier_vu }.
+    Les entrées plus vieilles que `window_days` sont évincées au chargement.
+    """
+
+    def __init__(self, path=SEEN_INDEX_PATH, window_days: float = SEEN_WINDOW_DAYS):
+        self.path = path
+        self.window = window_days * 86400
+        self._lock = threading.Lock()
+        self._items = read_json(path, {}) or {}
+        self.evict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, article_hash: str) -> bool:
+        return article_hash[:KEY_LEN] in self._items
+
+    def evict(self, now: float = None) -> int:
+        """Supprime les entrées hors fenêtre, renvoie le nombre d'évictions."""
+        limit = (now or time.time()) - self.window
+        with self._lock:
+            old = [k for k, ts in self._items.items() if ts < limit]
+            for k in old:
+                del self._items[k]
+        return len(old)
+
+    @staticmethod
+    def _hashes(article: dict) -> list:
+        """Hash de l'article et de ses reprises fusionnées (sources_alternatives)."""
+        alternates = [alt["hash"] for alt in article.get("sources_alternatives", []) if alt.get("hash")]
+        return [article["hash"]] + alternates
+
+    def is_seen(self, article: dict) -> bool:
+        """Vrai si l'article ou l'une de ses reprises a déjà été traité."""
+        return any(h in self for h in self._hashes(article))
+
+    def filter_new(self, articles: list) -> list:
+        """Ne garde que les articles jamais vus, reprises comprises (ordre conservé)."""
+        return [a for a in articles if not self.is_seen(a)]
+
+    def mark(self, articles: list, now: float = None):
+        """
+        Enregistre les articles et leurs reprises comme vus (le premier
+        passage fait foi).
+        """
+        ts = int(now or time.time())
+        with self._lock:
+            for a in articles:
+                for h in self._hashes(a):
+                    self._items.setdefault(h[:KEY_LEN], ts)
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(self.path, self._items)
@@ -0,0 +1,130 @@
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from app.core.config import MMR_LAMBDA
+from app.core.near_duplicates import normalize
+
+# Pertinence : poids de l'importance (1-5) vs fraîcheur, demi-vie (jours)
+POIDS_IMPORTANCE = 0.7
+POIDS_FRAICHEUR = 0.3
+DEMI_VIE_JOURS = 3
+# Similarité ajoutée entre deux articles de même source / même sous-thème
+BONUS_SOURCE = 0.2
+BONUS_SOUS_THEME = 0.2
+# Caractères du résumé pris en compte dans les vecteurs texte
+RESUME_CHARS = 400
+
+
+def fraicheur(article: dict, now: datetime) -> float:
+    """1 pour un article du jour, 0.5 après DEMI_VIE_JOURS ; 0.5 si date inconnue."""
+    raw = article.get("date_publication")
+    if not raw:
+        return 0.5
+    try:
+        date = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return 0.5
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    age = max(0.0, (now - date).total_seconds() / 86400)
+    return math.pow(0.5, age / DEMI_VIE_JOURS)
+
+
+def source(article: dict) -> str:
+    """Source réelle : le domaine de l'URL (le champ source est parfois le titre du flux)."""
+    return urlsplit(article.get("url") or "").netloc or article.get("source", "")
+
+
+def pertinence(articles: list) -> list:
+    now = datetime.now(timezone.utc)
+    scores = []
+    for a in articles:
+        try:
+            importance = min(5, max(1, int(a.get("importance", 3))))
+        except (TypeError, ValueError):
+            importance = 3
+        scores.append(POIDS_IMPORTANCE * importance / 5 + POIDS_FRAICHEUR * fraicheur(a, now))
+    return scores
+
+
+def _vecteurs(articles: list) -> list:
+    """Vecteurs TF-IDF creux et normés (titre x2, tags, sous-thème, début du résumé)."""
+    docs = []
+    for a in articles:
+        words = normalize(a.get("titre", "")) * 2
+        words += normalize(" ".join(a.get("tags") or []))
+        words += normalize(a.get("sous_theme", ""))
+        words += normalize((a.get("resume") or "")[:RESUME_CHARS])
+        docs.append(Counter(words))
+
+    df = Counter(w for doc in docs for w in doc)
+    n = len(docs)
+    vectors = []
+    for doc in docs:
+        vec = {w: c * (math.log((1 + n) / (1 + df[w])) + 1) for w, c in doc.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({w: v / norm for w, v in vec.items()})
+    return vectors
+
+
+def _cosinus(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(w, 0.0) for w, v in a.items())
+
+
+def selection_mmr(articles: list, k: int = 10, lambda_: float = MMR_LAMBDA) -> list:
+    """
+    Sélection par Maximal Marginal Relevance, sans LLM.
+
+    À chaque étape on retient l'article qui maximise
+        lambda x pertinence - (1 - lambda) x similarité max aux articles déjà retenus
+    où la similarité = cosinus TF-IDF + bonus même source / même sous-thème.
+    La similarité max est mise à jour incrémentalement → O(k x n).
+    Renvoie au plus k indices, dans l'ordre de sélection.
+    """
+    n = len(articles)
+    if n == 0:
+        return []
+
+    rel = pertinence(articles)
+    vectors = _vecteurs(articles)
+    sources = [source(a) for a in articles]
+    themes = [a.get("sous_theme") for a in articles]
+
+    max_sim = [0.0] * n
+    remaining = set(range(n))
+    chosen = []
+
+    while remaining and len(chosen) < k:
+        best = max(remaining, key=lambda i: (lambda_ * rel[i] - (1 - lambda_) * max_sim[i], -i))
+        remaining.discard(best)
+        chosen.append(best)
+
+        for i in remaining:
+            sim = _cosinus(vectors[i], vectors[best])
+            if sources[i] == sources[best]:
+                sim += BONUS_SOURCE
+            if themes[i] and themes[i] == themes[best]:
+                sim += BONUS_SOUS_THEME
+            if sim > max_sim[i]:
+                max_sim[i] = min(1.0, sim)
+
+    return chosen
+
+
+def choisir_selection_locale(articles: list, k: int = 10) -> dict:
+    """
+    Sélection complète sans LLM, au format de choisir_selection.
+    index_audio : l'article retenu le plus pertinent, à résumé le plus fourni
+    en cas d'égalité (c'est lui qui sert au script audio).
+    """
+    indices = selection_mmr(articles, k)
+    if not indices:
+        return {"indices_selection": [], "index_audio": 0}
+
+    rel = pertinence(articles)
+    audio = max(indices, key=lambda i: (round(rel[i], 3), len(articles[i].get("resume") or "")))
+    return {"indices_selection": indices, "index_audio": audio}
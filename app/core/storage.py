@@ -0,0 +1,29 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def read_json(path: Path, default=None):
+    """Lit un fichier JSON, renvoie `default` s'il est absent ou illisible."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: Path, data, indent=None):
+    """
+    Écrit un JSON de façon atomique (fichier temporaire + os.replace) :
+    un crash en pleine écriture ne laisse jamais un fichier tronqué.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
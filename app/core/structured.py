@@ -0,0 +1,65 @@
+import json
+import re
+
+# Schémas minimalistes, sans dépendance :
+# - un type Python (str, int, list, dict…) → isinstance
+# - un tuple de types → l'un d'eux
+# - un dict {clé: schéma} → objet avec ces clés obligatoires
+# - une liste [schéma] → tableau dont chaque élément suit le schéma
+
+
+def parse_json(text: str):
+    """
+    Décode la réponse du LLM. JSON strict d'abord (mode JSON natif), puis,
+    si le modèle a mis du texte autour, le premier bloc {...} trouvé.
+    Lève ValueError si rien n'est lisible.
+    """
+    text = (text or "").strip()
+    if not text:
+        raise ValueError("réponse vide")
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    match = re.search(r"\{[\s\S]*\}", text)
+    if not match:
+        raise ValueError("aucun objet JSON dans la réponse")
+    try:
+        return json.loads(match.group(0))
+    except ValueError as e:
+        raise ValueError(f"JSON invalide : {e}")
+
+
+def valider(data, schema, chemin: str = "$"):
+    """Renvoie None si data respecte le schéma, sinon un message d'erreur court."""
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            return f"{chemin} : objet attendu"
+        for key, sub in schema.items():
+            if key not in data:
+                return f"{chemin}.{key} : champ manquant"
+            err = valider(data[key], sub, f"{chemin}.{key}")
+            if err:
+                return err
+        return None
+
+    if isinstance(schema, list):
+        if not isinstance(data, list):
+            return f"{chemin} : tableau attendu"
+        for i, item in enumerate(data):
+            err = valider(item, schema[0], f"{chemin}[{i}]")
+            if err:
+                return err
+        return None
+
+    types = schema if isinstance(schema, tuple) else (schema,)
+    # bool est un int pour Python, pas pour un schéma JSON
+    if isinstance(data, bool) and bool not in types:
+        return f"{chemin} : {_nom(types)} attendu"
+    if not isinstance(data, types):
+        return f"{chemin} : {_nom(types)} attendu"
+    return None
+
+
+def _nom(types) -> str:
+    return " ou ".join(t.__name__ for t in types)
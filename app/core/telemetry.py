@@ -0,0 +1,126 @@
+import bisect
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from app.core.config import (
+    RUN_REPORT_DIR,
+    LLM_PRICE_INPUT_PER_M,
+    LLM_PRICE_OUTPUT_PER_M,
+    TTS_PRICE_PER_M_CHARS,
+)
+from app.core.storage import write_json_atomic
+
+# Bornes des histogrammes de durée (secondes)
+BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 60]
+
+
+def _histogramme(values) -> dict:
+    counts = Counter(bisect.bisect_left(BUCKETS, v) for v in values)
+    labels = [f"<={b}s" for b in BUCKETS] + [f">{BUCKETS[-1]}s"]
+    return {labels[i]: counts[i] for i in range(len(labels)) if counts[i]}
+
+
+def _quantile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+
+class Telemetry:
+    """
+    Télémétrie des appels LLM et TTS du run : un enregistrement par appel
+    upstream (durée, attente dans le limiteur, tokens, statut HTTP, étape,
+    fournisseur), agrégé par étape dans le rapport de run.
+    """
+
+    def __init__(self):
+        self._calls = []
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def reset(self):
+        """Début d'un nouveau run dans le même process (ex. bouton de l'UI Streamlit)."""
+        with self._lock:
+            self._calls = []
+            self.started = time.time()
+
+    def record(self, kind: str, stage: str, provider: str, status, wall_s: float, queue_s: float = 0.0,
+               prompt_tokens: int = 0, completion_tokens: int = 0, **extra):
+        call = {
+            "t": round(time.time() - self.started, 3),
+            "type": kind,
+            "etape": stage,
+            "fournisseur": provider,
+            "statut": status,
+            "duree_s": round(wall_s, 3),
+            "attente_s": round(queue_s, 3),
+            "tokens_prompt": prompt_tokens,
+            "tokens_completion": completion_tokens,
+            **extra,
+        }
+        with self._lock:
+            self._calls.append(call)
+
+    def calls(self) -> list:
+        with self._lock:
+            return list(self._calls)
+
+    def summary(self) -> dict:
+        """Par étape : appels, erreurs, statuts, tokens, coût estimé, histogrammes."""
+        stages = {}
+        for call in self.calls():
+            stages.setdefault(call["etape"], []).append(call)
+
+        result = {}
+        for stage, calls in sorted(stages.items()):
+            durations = [c["duree_s"] for c in calls]
+            waits = [c["attente_s"] for c in calls]
+            prompt = sum(c["tokens_prompt"] for c in calls)
+            completion = sum(c["tokens_completion"] for c in calls)
+            chars = sum(c.get("caracteres", 0) for c in calls)
+            cost = (
+                prompt * LLM_PRICE_INPUT_PER_M + completion * LLM_PRICE_OUTPUT_PER_M + chars * TTS_PRICE_PER_M_CHARS
+            ) / 1_000_000
+            result[stage] = {
+                "appels": len(calls),
+                "erreurs": sum(1 for c in calls if c["statut"] != 200),
+                "statuts": dict(Counter(str(c["statut"]) for c in calls)),
+                "tokens_prompt": prompt,
+                "tokens_completion": completion,
+                "caracteres_tts": chars,
+                "cout_estime_usd": round(cost, 6),
+                "duree_totale_s": round(sum(durations), 2),
+                "duree_p50_s": _quantile(durations, 0.5),
+                "duree_p95_s": _quantile(durations, 0.95),
+                "duree_max_s": round(max(durations), 3),
+                "attente_totale_s": round(sum(waits), 2),
+                "histogramme_duree": _histogramme(durations),
+                "histogramme_attente": _histogramme(waits),
+            }
+        return result
+
+    def write_report(self, extra: dict = None):
+        """Écrit le rapport JSON du run dans RUN_REPORT_DIR et renvoie son chemin."""
+        started = datetime.fromtimestamp(self.started)
+        report = {
+            "debut": started.isoformat(timespec="seconds"),
+            "duree_s": round(time.time() - self.started, 2),
+            "etapes": self.summary(),
+            **(extra or {}),
+            "appels": self.calls(),
+        }
+        RUN_REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        path = RUN_REPORT_DIR / f"run_{started:%Y%m%d-%H%M%S}.json"
+        n = 1
+        while path.exists() and n < 100:  # deux runs dans la même seconde
+            n += 1
+            path = RUN_REPORT_DIR / f"run_{started:%Y%m%d-%H%M%S}_{n}.json"
+        write_json_atomic(path, report, indent=2)
+        return path
+
+
+# Télémétrie du process, remise à zéro au début de chaque run (voir pipeline.py)
+telemetry = Telemetry()
@@ -1,8 +1,6 @@
-import json
-import re
-
-from app.core.llm import groq_chat
+from app.core.llm import groq_chat_json
 from app.core.logging_utils import setup_logger
+from app.core.tokens import max_tokens_sortie
 
 logger = setup_logger(__name__)
 
@@ -76,23 +74,13 @@ def detect_themes(texte: str):
         return base
 
     # 2) Sinon → fallback LLM
-    rep = groq_chat(SYSTEM, USER.format(texte=texte), temperature=0.1, max_tokens=150)
-
-    if not rep:
-        logger.error("❌ Aucune réponse du LLM")
-        return []
+    data = groq_chat_json(
+        SYSTEM, USER.format(texte=texte), {"themes": [str]},
+        temperature=0.1, max_tokens=max_tokens_sortie(0, fixe=30), stage="themes",
+    )
 
-    # Extraire JSON
-    match = re.search(r"\{[\s\S]*\}", rep)
-    if not match:
-        logger.error("❌ JSON introuvable dans : %s", rep)
+    if data is None:
+        logger.error("❌ Aucune réponse exploitable du LLM")
         return []
 
-    try:
-        data = json.loads(match.group(0))
-        themes = data.get("themes", [])
-    except Exception:
-        logger.error("JSON invalide : %s", rep)
-        themes = []
-
-    return themes
+    return data["themes"]
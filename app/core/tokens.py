@@ -0,0 +1,102 @@
+import html
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from app.core.config import LLM_REASONING_TOKENS
+
+# Approximation usuelle pour les tokenizers BPE : ~4 caractères par token
+CHARS_PER_TOKEN = 4
+
+# Texte français généré : ~1,4 token par mot
+TOKENS_PER_WORD = 1.4
+
+# Marge sur la sortie attendue avant de couper la génération
+OUTPUT_MARGIN = 1.25
+
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_BOILERPLATE_RE = [
+    re.compile(r"The post .{0,300}? appeared first on .{0,200}?\.?\s*$", re.I | re.S),
+    # lien "Read more…" final uniquement : en début de phrase et suivi au plus
+    # d'un titre court, jamais au milieu d'une phrase de l'article
+    re.compile(
+        r"(?:^|(?<=[.!?…»\"\]]))\s*\b(Continue reading|Read more|Read the full (story|article)|Lire la suite)"
+        r"\W{0,5}[^.!?]{0,80}[.!?]?\s*$",
+        re.I,
+    ),
+    re.compile(r"\[\s*(…|\.\.\.|&#8230;)\s*\]"),
+    re.compile(r"\[\+\d+ chars\]"),  # troncature NewsAPI
+]
+_SPACES_RE = re.compile(r"\s+")
+
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation locale (sans tokenizer) du nombre de tokens d'un texte."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def nettoyer_texte(text: str) -> str:
+    """
+    Texte de flux → texte brut : balises HTML et entités retirées, formules
+    de fin de flux ("The post … appeared first on …", "Read more…") supprimées,
+    espaces normalisés.
+    """
+    text = _SCRIPT_STYLE_RE.sub(" ", text or "")
+    text = html.unescape(_TAG_RE.sub(" ", text))
+    for pattern in _BOILERPLATE_RE:
+        text = pattern.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def tronquer(text: str, budget: int) -> str:
+    """
+    Coupe le texte à ~budget tokens, de préférence à la fin d'une phrase,
+    sinon à la fin d'un mot. Texte inchangé s'il tient dans le budget.
+    """
+    text = text or ""
+    max_chars = budget * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if end >= max_chars // 2:
+        return cut[:end + 1]
+    return cut.rsplit(" ", 1)[0] + "…"
+
+
+def max_tokens_sortie(mots: int, fixe: int = 0, n: int = 1) -> int:
+    """
+    max_tokens d'un appel, déduit de la sortie attendue : n réponses de
+    `mots` mots + `fixe` tokens de structure (clés JSON, indices…), avec marge,
+    plus la réserve de raisonnement du modèle (LLM_REASONING_TOKENS).
+    """
+    sortie = (mots * TOKENS_PER_WORD + fixe) * n * OUTPUT_MARGIN
+    return math.ceil(sortie) + LLM_REASONING_TOKENS
+
+
+def compter(stage: str, avant: str, apres: str):
+    """Enregistre les tokens d'entrée d'une étape avant / après nettoyage et troncature."""
+    with _stats_lock:
+        _stats[stage].update(avant=estimate_tokens(avant), apres=estimate_tokens(apres), textes=1)
+
+
+def reset_budget_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def budget_stats() -> dict:
+    """Tokens d'entrée estimés par étape : avant, après, économie en %."""
+    with _stats_lock:
+        return {
+            stage: {
+                **c,
+                "economie_pct": round(100 * (1 - c["apres"] / c["avant"]), 1) if c["avant"] else 0.0,
+            }
+            for stage, c in _stats.items()
+        }
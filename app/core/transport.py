@@ -0,0 +1,131 @@
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.core.config import (
+    HTTP_MODE,
+    HTTP_CASSETTE_DIR,
+    HTTP_REPLAY_LATENCY_MS,
+    HTTP_REPLAY_JITTER_MS,
+)
+from app.core.storage import read_json, write_json_atomic
+
+# Paramètres / champs jamais enregistrés ni pris en compte dans la clé
+SECRET_KEYS = {"apikey", "api_key", "key", "token", "password"}
+# En-têtes de réponse inutiles (ou sensibles) dans une cassette
+DROPPED_HEADERS = {"set-cookie", "content-encoding", "transfer-encoding", "connection"}
+
+_lock = threading.Lock()
+# Compteurs par (mode, hôte) : utile pour vérifier qu'un replay est 100 % local
+stats = Counter()
+
+
+def reset_stats():
+    """Compteurs remis à zéro (début d'un run)."""
+    with _lock:
+        stats.clear()
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """Mode replay : aucune réponse enregistrée pour cette requête."""
+
+
+def _strip_secrets(data):
+    if isinstance(data, dict):
+        return {k: _strip_secrets(v) for k, v in data.items() if k.lower() not in SECRET_KEYS}
+    if isinstance(data, list):
+        return [_strip_secrets(v) for v in data]
+    return data
+
+
+def _cassette_key(method: str, url: str, params, body) -> str:
+    """Clé stable d'une requête : méthode + URL + paramètres + corps JSON, sans secrets."""
+    canonical = json.dumps(
+        [method.upper(), url, _strip_secrets(params or {}), _strip_secrets(body)],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _build_response(record: dict, url: str) -> requests.Response:
+    """Reconstruit un requests.Response complet depuis une cassette."""
+    r = requests.Response()
+    r.status_code = record["status"]
+    r.reason = record.get("reason", "")
+    r.headers = CaseInsensitiveDict(record.get("headers", {}))
+    r.encoding = record.get("encoding")
+    r.url = url
+    r._content = base64.b64decode(record["body"])
+    # contenu déjà "lu" : iter_content / iter_lines le redécoupent depuis la mémoire
+    r._content_consumed = True
+    return r
+
+
+def _inject_latency():
+    delay = random.gauss(HTTP_REPLAY_LATENCY_MS, HTTP_REPLAY_JITTER_MS) if HTTP_REPLAY_JITTER_MS else HTTP_REPLAY_LATENCY_MS
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+
+def request(method: str, url: str, *, params=None, json=None, headers=None, timeout=None, stream=False,
+            session=None, mode: str = None) -> requests.Response:
+    """
+    Point de passage unique des appels HTTP sortants (flux RSS, NewsAPI,
+    Groq chat / TTS, SMTP2GO).
+
+    HTTP_MODE :
+    - live   : appel réseau normal
+    - record : appel réseau + réponse enregistrée dans HTTP_CASSETTE_DIR
+    - replay : réponse relue depuis la cassette (aucun accès réseau), avec
+               une latence injectée de HTTP_REPLAY_LATENCY_MS ± HTTP_REPLAY_JITTER_MS
+    """
+    mode = mode or HTTP_MODE
+    host = urlsplit(url).netloc
+
+    if mode == "live":
+        with _lock:
+            stats[("live", host)] += 1
+        sender = session or requests
+        return sender.request(method, url, params=params, json=json, headers=headers, timeout=timeout, stream=stream)
+
+    key = _cassette_key(method, url, params, json)
+    path = HTTP_CASSETTE_DIR / f"{key}.json"
+
+    if mode == "replay":
+        record = read_json(path)
+        if record is None:
+            with _lock:
+                stats[("miss", host)] += 1
+            raise CassetteMissError(f"Aucune cassette pour {method} {url} ({key[:12]})")
+        _inject_latency()
+        with _lock:
+            stats[("replay", host)] += 1
+        return _build_response(record, url)
+
+    if mode != "record":
+        raise ValueError(f"HTTP_MODE inconnu : {mode}")
+
+    sender = session or requests
+    r = sender.request(method, url, params=params, json=json, headers=headers, timeout=timeout, stream=stream)
+    record = {
+        "request": {"method": method.upper(), "url": url, "params": _strip_secrets(params or {})},
+        "status": r.status_code,
+        "reason": r.reason,
+        "headers": {k: v for k, v in r.headers.items() if k.lower() not in DROPPED_HEADERS},
+        "encoding": r.encoding,
+        "body": base64.b64encode(r.content).decode("ascii"),
+    }
+    HTTP_CASSETTE_DIR.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(path, record)
+    with _lock:
+        stats[("record", host)] += 1
+    return r
@@ -0,0 +1,155 @@
+import math
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from app.core.config import IA_THEME, TRIAGE_MIN_SCORE, TRIAGE_TOP_N
+from app.core.near_duplicates import normalize
+from app.core.theme_detector import KEYWORDS
+
+# Réputation par domaine (0 → 1) ; domaine inconnu = DEFAULT_REPUTATION
+SOURCE_REPUTATION = {
+    "openai.com": 1.0,
+    "ai.googleblog.com": 1.0,
+    "blog.google": 1.0,
+    "huggingface.co": 0.9,
+    "aws.amazon.com": 0.8,
+    "www.technologyreview.com": 1.0,
+    "www.theverge.com": 0.8,
+    "www.nytimes.com": 0.9,
+    "semianalysis.com": 0.9,
+    "www.nvidia.com": 0.8,
+    "www.wired.com": 0.8,
+    "www.reuters.com": 0.9,
+    "www.cnbc.com": 0.7,
+    "www.cnet.com": 0.6,
+    "biztoc.com": 0.2,
+    "onefootball.com": 0.1,
+}
+DEFAULT_REPUTATION = 0.4
+
+# Bruit évident : offres d'emploi, changelogs, contenus sponsorisés…
+NOISE_RE = re.compile(
+    r"\b(we'?re hiring|job (opening|offer|posting)|careers? at|offre d'emploi|recrute|"
+    r"changelog|release notes|patch notes|sponsored|webinar|giveaway|deal of the day|"
+    r"v\d+\.\d+(\.\d+)?)\b",
+    re.IGNORECASE,
+)
+
+# Mots-clés → sous-thème d'agent_2 (pour les articles qui ne passent pas au LLM)
+SOUS_THEMES_HEURISTIQUES = [
+    ({"llm", "gpt", "chatgpt", "claude", "gemini", "llama", "language"}, "LLM"),
+    ({"robot", "robots", "robotics", "humanoid"}, "robotique"),
+    ({"vision", "image", "images", "video", "diffusion"}, "vision"),
+    ({"gpu", "gpus", "chip", "chips", "nvidia", "tpu", "semiconductor", "datacenter"}, "chips & hardware IA"),
+    ({"security", "securite", "attack", "vulnerability", "incident", "privacy"}, "sécurité IA"),
+    ({"cloud", "aws", "azure", "gcp", "sagemaker", "bedrock"}, "cloud AI"),
+    ({"research", "paper", "arxiv", "benchmark", "study"}, "recherche IA"),
+    ({"regulation", "law", "policy", "jobs", "society", "ethics"}, "IA & société"),
+    ({"generative", "genai", "agent", "agents"}, "IA générative"),
+]
+
+# Vocabulaire « sujet IA » : clés de KEYWORDS + mots des sous-thèmes
+TOPIC_TERMS = (
+    {w for key in KEYWORDS for w in normalize(key)}
+    | {w for words, _ in SOUS_THEMES_HEURISTIQUES for w in words}
+    | {"ai", "ia", "model", "models", "neural", "learning", "inference", "training"}
+)
+
+WEIGHTS = {"keywords": 0.35, "tfidf": 0.25, "length": 0.2, "source": 0.2}
+# Hors thème IA, seuls ces critères comptent (pondérations renormalisées)
+QUALITY_FEATURES = ("length", "source")
+NOISE_PENALTY = 0.4
+
+
+def _domain(url: str) -> str:
+    return urlsplit(url or "").netloc.lower()
+
+
+def _keyword_score(title_words: list, words: list) -> float:
+    """Occurrences des mots-clés IA (titre compté double), saturées à 1."""
+    hits = sum(2 for w in title_words if w in TOPIC_TERMS) + sum(1 for w in words if w in TOPIC_TERMS)
+    return 1 - math.exp(-hits / 3)
+
+
+def _est_ia(article: dict) -> bool:
+    """Article du thème IA (ou sans thème : veille IA par défaut)."""
+    themes = article.get("themes") or ([article["theme"]] if article.get("theme") else [])
+    return not themes or IA_THEME in themes
+
+
+def _length_score(resume: str) -> float:
+    """0 pour un résumé vide, ~1 à partir de ~400 caractères."""
+    return min(1.0, math.log1p(len(resume or "")) / math.log1p(400))
+
+
+def score_articles(articles: list) -> list:
+    """
+    Score local (0 → 1) de chaque article, sans LLM :
+    mots-clés IA, similarité TF-IDF au vocabulaire IA, longueur du résumé,
+    réputation de la source, pénalité pour le bruit évident.
+    Les critères IA ne s'appliquent qu'aux articles du thème IA : un article
+    d'un autre thème actif (sport, politique…) n'est noté que sur la longueur
+    et la source.
+    """
+    docs = [normalize(a.get("titre", "")) + normalize(a.get("resume", "")) for a in articles]
+
+    # IDF sur le corpus de la semaine : un mot présent partout pèse peu
+    df = Counter(w for doc in docs for w in set(doc))
+    n = len(docs)
+    idf = {w: math.log((1 + n) / (1 + c)) + 1 for w, c in df.items()}
+
+    scores = []
+    for art, doc in zip(articles, docs):
+        tf = Counter(doc)
+        vec = {w: c * idf[w] for w, c in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        # cosinus avec le vecteur « sujet IA » (poids = idf des termes du sujet)
+        topic_norm = math.sqrt(sum(idf.get(w, 0) ** 2 for w in TOPIC_TERMS)) or 1.0
+        tfidf = sum(v * idf[w] for w, v in vec.items() if w in TOPIC_TERMS) / (norm * topic_norm)
+
+        features = {
+            "keywords": _keyword_score(normalize(art.get("titre", "")), doc),
+            "tfidf": min(1.0, tfidf * 4),
+            "length": _length_score(art.get("resume", "")),
+            "source": SOURCE_REPUTATION.get(_domain(art.get("url")), DEFAULT_REPUTATION),
+        }
+        if _est_ia(art):
+            score = sum(WEIGHTS[k] * v for k, v in features.items())
+        else:
+            score = sum(WEIGHTS[k] * features[k] for k in QUALITY_FEATURES) / sum(WEIGHTS[k] for k in QUALITY_FEATURES)
+        if NOISE_RE.search(art.get("titre", "") + " " + art.get("resume", "")):
+            score -= NOISE_PENALTY
+        scores.append(round(max(0.0, score), 3))
+
+    return scores
+
+
+def enrichir_sans_llm(article: dict, score: float) -> dict:
+    """Sous-thème / importance / tags heuristiques pour un article écarté du LLM."""
+    words = set(normalize(article.get("titre", "") + " " + article.get("resume", "")))
+    if _est_ia(article):
+        sous_theme = next((theme for vocab, theme in SOUS_THEMES_HEURISTIQUES if words & vocab), "IA – Divers")
+    else:
+        sous_theme = article.get("theme") or "Divers"
+
+    enriched = dict(article)
+    enriched["sous_theme"] = sous_theme
+    enriched["importance"] = 1 + round(2 * min(1.0, score))
+    enriched["tags"] = sorted(words & TOPIC_TERMS)[:5]
+    enriched["analyse"] = "triage"
+    return enriched
+
+
+def trier(articles: list, min_score: float = TRIAGE_MIN_SCORE, top_n: int = TRIAGE_TOP_N):
+    """
+    Répartit les articles entre LLM et heuristique.
+    Passent au LLM : score >= min_score, et au plus top_n (0 = pas de limite).
+    Renvoie (indices_llm, indices_ignorés, scores), indices dans l'ordre d'entrée.
+    """
+    scores = score_articles(articles)
+    ranked = sorted((i for i, s in enumerate(scores) if s >= min_score), key=lambda i: (-scores[i], i))
+    if top_n:
+        ranked = ranked[:top_n]
+    keep = set(ranked)
+    return sorted(keep), [i for i in range(len(articles)) if i not in keep], scores
@@ -0,0 +1,285 @@
+"""
+Serveur local compatible OpenAI (chat + TTS) pour les tests de charge hors-ligne.
+
+Il imite l'API Groq utilisée par le pipeline :
+- POST /v1/chat/completions : réponses au format attendu par chaque agent
+  (analyse unitaire / par lot, curateur, détection de thèmes, script audio,
+  email), en mode normal ou en flux SSE, avec un bloc "usage"
+- POST /v1/audio/speech : MP3 silencieux de durée proportionnelle au texte
+- GET /stats : compteurs du serveur
+
+Latence, taux de 429 et quotas RPM / TPM sont réglables :
+
+    python mock_llm_server.py --port 8000 --latency-ms 800 --jitter-ms 300 \\
+        --tokens-per-s 400 --rate-429 0.05 --rpm 30 --tpm 8000
+
+puis, côté pipeline :
+
+    GROQ_BASE_URL=http://127.0.0.1:8000/v1 TTS_URL=http://127.0.0.1:8000/v1/audio/speech \\
+        LLM_CACHE_ENABLED=False python pipeline.py
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SOUS_THEMES = ["LLM", "machine learning", "deep learning", "NLP", "vision", "robotique", "IA générative"]
+
+PHRASES = [
+    "Les modèles de langage progressent encore cette semaine.",
+    "Plusieurs laboratoires publient des résultats notables sur le raisonnement.",
+    "Les coûts d'inférence continuent de baisser pour les entreprises.",
+    "La régulation européenne précise ses obligations de transparence.",
+    "De nouveaux agents autonomes arrivent dans les outils de développement.",
+    "Les fabricants de puces annoncent des accélérateurs plus efficaces.",
+]
+
+# MP3 silencieux : trame MPEG-1 Layer III, 128 kb/s, 44,1 kHz (417 octets, ~26 ms)
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+MP3_FRAMES_PER_S = 44100 / 1152
+TTS_CHARS_PER_S = 15
+
+
+def _tokens(text: str) -> int:
+    return math.ceil(len(text or "") / 4)
+
+
+def _texte(max_tokens: int) -> str:
+    """Texte libre d'environ 70 % de max_tokens."""
+    words = []
+    target = max(20, int(max_tokens * 0.7 / 1.4))
+    while len(words) < target:
+        words.extend(random.choice(PHRASES).split())
+    return " ".join(words[:target]).rstrip(".") + "."
+
+
+def _analyse(hash_=None) -> dict:
+    data = {
+        "resume_detaille": " ".join(random.sample(PHRASES, 4)),
+        "sous_theme": random.choice(SOUS_THEMES),
+        "importance": random.randint(1, 5),
+        "tags": random.sample(["IA", "LLM", "recherche", "produit", "cloud", "éthique"], 3),
+    }
+    return {"hash": hash_, **data} if hash_ is not None else data
+
+
+def repondre(system: str, user: str, max_tokens: int) -> str:
+    """Contenu de réponse selon l'agent appelant (reconnu à son prompt système)."""
+    if '"indices_selection"' in system:
+        indices = [int(i) for i in re.findall(r'"i":\s*(\d+)', user)]
+        if not indices:
+            try:
+                indices = list(range(len(json.loads(user[user.index("["):user.rindex("]") + 1]))))
+            except ValueError:
+                indices = list(range(10))
+        chosen = indices[:10]
+        return json.dumps({"indices_selection": chosen, "index_audio": chosen[0] if chosen else 0})
+    if '"articles"' in system and "hash" in system:
+        hashes = re.findall(r"### hash : (\S+)", user)
+        return json.dumps({"articles": [_analyse(h) for h in hashes]}, ensure_ascii=False)
+    if '"resume_detaille"' in system:
+        return json.dumps(_analyse(), ensure_ascii=False)
+    if '"themes"' in system:
+        return json.dumps({"themes": ["intelligence artificielle"]}, ensure_ascii=False)
+    return _texte(max_tokens)
+
+
+class MockState:
+    """Réglages, quotas glissants sur 60 s et compteurs du serveur."""
+
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.requests = deque()  # horodatages
+        self.tokens = deque()    # (horodatage, tokens)
+        self.stats = Counter()
+
+    def latency(self, completion_tokens: int) -> float:
+        base = self.args.latency_ms / 1000
+        jitter = self.args.jitter_ms / 1000
+        if self.args.distribution == "lognormal" and base > 0:
+            sigma = math.sqrt(math.log(1 + (jitter / base) ** 2)) if jitter else 0
+            delay = random.lognormvariate(math.log(base) - sigma ** 2 / 2, sigma)
+        elif self.args.distribution == "exponential" and base > 0:
+            delay = random.expovariate(1 / base)
+        else:
+            delay = random.gauss(base, jitter) if jitter else base
+        generation = completion_tokens / self.args.tokens_per_s if self.args.tokens_per_s else 0
+        return max(0.0, delay) + generation
+
+    def admit(self, tokens: int):
+        """None si la requête passe, sinon le délai (s) à renvoyer dans Retry-After."""
+        now = time.monotonic()
+        with self.lock:
+            while self.requests and now - self.requests[0] > 60:
+                self.requests.popleft()
+            while self.tokens and now - self.tokens[0][0] > 60:
+                self.tokens.popleft()
+
+            if random.random() < self.args.rate_429:
+                self.stats["429_aleatoires"] += 1
+                return round(random.uniform(0.5, 2), 2)
+            if self.args.rpm and len(self.requests) >= self.args.rpm:
+                self.stats["429_rpm"] += 1
+                return round(60 - (now - self.requests[0]), 2)
+            used = sum(t for _, t in self.tokens)
+            if self.args.tpm and self.tokens and used + tokens > self.args.tpm:
+                self.stats["429_tpm"] += 1
+                return round(60 - (now - self.tokens[0][0]), 2)
+
+            self.requests.append(now)
+            self.tokens.append((now, tokens))
+            return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: MockState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, data, headers=None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.state.lock:
+                return self._json(200, dict(self.state.stats))
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json(400, {"error": {"message": "JSON invalide"}})
+
+        if self.path.endswith("/chat/completions"):
+            return self._chat(body)
+        if self.path.endswith("/audio/speech"):
+            return self._speech(body)
+        self._json(404, {"error": {"message": f"route inconnue : {self.path}"}})
+
+    def _refuser(self, retry_after: float):
+        self._json(
+            429, {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            headers={
+                "Retry-After": str(max(1, math.ceil(retry_after))),
+                "x-ratelimit-reset-requests": f"{retry_after}s",
+                "x-ratelimit-reset-tokens": f"{retry_after}s",
+            },
+        )
+
+    def _chat(self, body: dict):
+        messages = body.get("messages") or []
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        max_tokens = int(body.get("max_tokens") or 500)
+
+        content = repondre(system, user, max_tokens)
+        prompt_tokens = sum(_tokens(m.get("content")) for m in messages)
+        completion_tokens = min(max_tokens, _tokens(content))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        retry_after = self.state.admit(usage["total_tokens"])
+        if retry_after is not None:
+            return self._refuser(retry_after)
+        with self.state.lock:
+            self.state.stats["chat"] += 1
+            self.state.stats["tokens"] += usage["total_tokens"]
+
+        delay = self.state.latency(completion_tokens)
+        if not body.get("stream"):
+            time.sleep(delay)
+            return self._json(200, {
+                "id": f"mock-{random.getrandbits(32):x}",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        # Flux SSE : premier morceau après la latence de base, puis au débit de génération
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = re.findall(r"\S+\s*", content)
+        generation = completion_tokens / self.state.args.tokens_per_s if self.state.args.tokens_per_s else 0
+        time.sleep(max(0.0, delay - generation))
+        per_word = generation / max(1, len(words))
+        for word in words:
+            self._chunk({"choices": [{"index": 0, "delta": {"content": word}}]})
+            time.sleep(per_word)
+        self._chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}})
+        self._chunk_raw(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, event: dict):
+        self._chunk_raw(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _chunk_raw(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _speech(self, body: dict):
+        text = body.get("input") or ""
+        retry_after = self.state.admit(0)
+        if retry_after is not None:
+            return self._refuser(retry_after)
+        with self.state.lock:
+            self.state.stats["tts"] += 1
+            self.state.stats["tts_caracteres"] += len(text)
+
+        seconds = max(1.0, len(text) / TTS_CHARS_PER_S)
+        time.sleep(self.state.latency(0))
+        self._send(200, MP3_FRAME * int(seconds * MP3_FRAMES_PER_S), content_type="audio/mpeg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local compatible OpenAI (chat + TTS) pour tests de charge")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=500, help="latence de base moyenne")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="écart-type de la latence de base")
+    parser.add_argument("--distribution", choices=["normal", "lognormal", "exponential"], default="lognormal")
+    parser.add_argument("--tokens-per-s", type=float, default=500, help="débit de génération (0 = instantané)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probabilité d'un 429 aléatoire")
+    parser.add_argument("--rpm", type=int, default=0, help="quota de requêtes par minute (0 = illimité)")
+    parser.add_argument("--tpm", type=int, default=0, help="quota de tokens par minute (0 = illimité)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    Handler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"🧪 Mock LLM/TTS sur http://{args.host}:{args.port}/v1  (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("📊", dict(Handler.state.stats))
+
+
+if __name__ == "__main__":
+    main()
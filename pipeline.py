@@ -1,53 +1,119 @@
-from app.agents.agent_1_collector import collecter_news
+import time
+
+from app.agents.agent_1_collector import collecter_news, marquer_articles_vus
 from app.agents.agent_2_analysis import analyser_articles
 from app.agents.agent_3_curator import choisir_selection
 from app.agents.agent_4_newsletter import generer_newsletter
 from app.agents.agent_4_blog import generer_blog
-from app.agents.agent_5_audio import generer_script_audio, generer_audio
+from app.agents.agent_5_audio import generer_capsule_audio
 from app.agents.agent_6_email import generer_email_top3
 from app.agents.agent_7_static_site import build_static_site
 
+from app.core import transport
+from app.core.llm import (
+    llm_cache_stats,
+    memo_stats,
+    providers_stats,
+    rate_limiter_stats,
+    reset_llm_stats,
+    structured_stats,
+)
+from app.core.tokens import budget_stats, reset_budget_stats
+from app.core.telemetry import telemetry
 from app.core.user_config import load_user_config
-from app.core.config import BLOG_PUBLIC_URL
+from app.core.config import BLOG_PUBLIC_URL, CAPSULE_ARTICLES, HTTP_MODE
 from app.core.logging_utils import setup_logger
 
 logger = setup_logger("pipeline")
 
 def pipeline_hebdomadaire(max_par_flux=20):
-    logger.info("🚀 Début pipeline…")
+    nouveau_run()
+    logger.info("🚀 Début pipeline… (HTTP_MODE=%s)", HTTP_MODE)
+    start = time.perf_counter()
+
+    try:
+        config = load_user_config()
+        themes = config.get("themes_actifs", [])
+
+        # 1) Collecte
+        raw = collecter_news(themes, max_par_flux=max_par_flux)
+        if not raw:
+            logger.warning("❌ Aucun article collecté")
+            return
+
+        # 2) Analyse
+        enriched = analyser_articles(raw)
+
+        # 3) Sélection IA
+        sel = choisir_selection(enriched)
+        indices = sel["indices_selection"]
+        idx_audio = sel["index_audio"]
+        top3 = indices[:3]
+
+        # 4) Génération audio
+        # article principal, puis les suivants de la sélection si la capsule en couvre plusieurs
+        capsule = [enriched[idx_audio]] + [enriched[i] for i in indices if i != idx_audio][:max(CAPSULE_ARTICLES - 1, 0)]
+        generer_capsule_audio(capsule)
+
+        # 5) Newsletter (avec blog_url obligatoire)
+        generer_newsletter(enriched, top3, idx_audio, blog_url=BLOG_PUBLIC_URL)
+
+        # 6) Blog
+        generer_blog(enriched, indices, idx_audio)
 
-    config = load_user_config()
-    themes = config.get("themes_actifs", [])
+        # 7) Email réel
+        email_ok = generer_email_top3(enriched, top3, idx_audio)
 
-    # 1) Collecte
-    raw = collecter_news(themes, max_par_flux=max_par_flux)
-    if not raw:
-        logger.warning("❌ Aucun article collecté")
-        return
+        # 8) Site statique
+        build_static_site(enriched, indices)
 
-    # 2) Analyse
-    enriched = analyser_articles(raw)
+        # 9) Articles marqués comme vus une fois publiés : après un échec, le
+        # run suivant les reprend (analyses servies par le store d'enrichissement)
+        if email_ok:
+            marquer_articles_vus(raw)
+        else:
+            logger.warning("⚠️ Envoi de l'email en échec : articles non marqués comme vus")
 
-    # 3) Sélection IA
-    sel = choisir_selection(enriched)
-    indices = sel["indices_selection"]
-    idx_audio = sel["index_audio"]
-    top3 = indices[:3]
+        logger.info("🎉 Pipeline terminée en %.1fs", time.perf_counter() - start)
+    finally:
+        # aussi pour un run vide ou interrompu : ce sont eux qu'il faut diagnostiquer
+        try:
+            ecrire_rapport()
+        except Exception as e:
+            logger.error("❌ Rapport de run non écrit : %s", e)
 
-    # 4) Génération audio
-    script = generer_script_audio(enriched[idx_audio])
-    generer_audio(script)
 
-    # 5) Newsletter (avec blog_url obligatoire)
-    generer_newsletter(enriched, top3, idx_audio, blog_url=BLOG_PUBLIC_URL)
+def nouveau_run():
+    """
+    Télémétrie et compteurs repartent de zéro : le rapport ne couvre que ce
+    run, même si le process en enchaîne plusieurs (UI Streamlit).
+    """
+    telemetry.reset()
+    reset_llm_stats()
+    reset_budget_stats()
+    transport.reset_stats()
 
-    # 6) Blog
-    generer_blog(enriched, indices, idx_audio)
 
-    # 7) Email réel
-    generer_email_top3(enriched, top3, idx_audio)
+def ecrire_rapport():
+    """Rapport JSON du run (télémétrie par étape + compteurs des couches LLM)."""
+    path = telemetry.write_report({
+        "http_mode": HTTP_MODE,
+        "cache_llm": llm_cache_stats(),
+        "memo_llm": memo_stats(),
+        "limiteur_groq": rate_limiter_stats(),
+        "fournisseurs": providers_stats(),
+        "appels_structures": structured_stats(),
+        "budget_tokens": budget_stats(),
+        "transport": {f"{mode} {host}": n for (mode, host), n in transport.stats.items()},
+    })
+    for stage, s in telemetry.summary().items():
+        logger.info(
+            "📊 %-12s %3d appels, %d erreurs, p95 %.2fs, %d+%d tokens, ~%.4f $",
+            stage, s["appels"], s["erreurs"], s["duree_p95_s"],
+            s["tokens_prompt"], s["tokens_completion"], s["cout_estime_usd"],
+        )
+    logger.info("🧾 Rapport de run → %s", path)
 
-    # 8) Site statique
-    build_static_site(enriched, indices)
 
-    logger.info("🎉 Pipeline terminée")
+if __name__ == "__main__":
+    pipeline_hebdomadaire()
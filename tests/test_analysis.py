@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from app.agents import agent_2_analysis
+from app.core import llm
+from app.core.memo import MemoLRU
+
+
+@pytest.fixture(autouse=True)
+def sans_cache(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(llm, "_memo", MemoLRU(0))
+
+
+def _articles(n):
+    return [{"hash": f"h{i}", "titre": f"Titre {i}", "source": "src", "resume": f"Résumé {i}"} for i in range(n)]
+
+
+def _analyse(h):
+    return {"hash": h, "resume_detaille": "Résumé", "sous_theme": "LLM", "importance": 4, "tags": ["IA"]}
+
+
+def test_lot_sans_reponse_fallback_sans_redecoupage(monkeypatch):
+    calls = []
+
+    def call(payload, stage="llm"):
+        calls.append(stage)
+        return "", 0, 503
+
+    monkeypatch.setattr(llm, "_call", call)
+    results = agent_2_analysis.analyser_lot(_articles(4))
+
+    assert len(calls) == 1
+    assert [r["analyse"] for r in results] == ["fallback"] * 4
+
+
+def test_lot_incomplet_redecoupe(monkeypatch):
+    calls = []
+
+    def call(payload, stage="llm"):
+        calls.append(stage)
+        hashes = [line.split(" : ")[1] for line in payload["messages"][-1]["content"].splitlines()
+                  if line.startswith("### hash : ")]
+        if stage == "analyse":
+            return json.dumps(_analyse(None)), 0, 200
+        # réponse par lot : le dernier article manque toujours
+        return json.dumps({"articles": [_analyse(h) for h in hashes[:-1]]}), 0, 200
+
+    monkeypatch.setattr(llm, "_call", call)
+    results = agent_2_analysis.analyser_lot(_articles(4))
+
+    assert [r["hash"] for r in results] == ["h0", "h1", "h2", "h3"]
+    assert [r["analyse"] for r in results] == ["llm"] * 4
+    assert calls == ["analyse_lot", "analyse"]
+
+
+def test_lot_trop_gros_redecoupe(monkeypatch):
+    calls = []
+
+    def call(payload, stage="llm"):
+        calls.append(stage)
+        if stage == "analyse_lot":
+            return "", 0, 400
+        return json.dumps(_analyse(None)), 0, 200
+
+    monkeypatch.setattr(llm, "_call", call)
+    results = agent_2_analysis.analyser_lot(_articles(2))
+
+    assert calls == ["analyse_lot", "analyse", "analyse"]
+    assert [r["analyse"] for r in results] == ["llm"] * 2
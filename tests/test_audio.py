@@ -0,0 +1,50 @@
+import io
+
+from app.agents.agent_5_audio import decouper_script, _ajouter_mp3, _id3v2_size
+
+
+def test_decouper_script_en_fin_de_phrase():
+    script = "Première phrase. Deuxième phrase ! Troisième phrase ? Quatrième."
+    chunks = decouper_script(script, max_chars=40)
+    assert chunks == ["Première phrase. Deuxième phrase !", "Troisième phrase ? Quatrième."]
+    assert all(len(c) <= 40 for c in chunks)
+
+
+def test_decouper_script_phrase_trop_longue_seule():
+    longue = "mot " * 30 + "fin."
+    chunks = decouper_script(f"Court. {longue} Encore court.", max_chars=50)
+    assert chunks == ["Court.", longue.strip(), "Encore court."]
+
+
+def test_decouper_script_vide():
+    assert decouper_script("", max_chars=50) == []
+
+
+def _id3(size: int, footer: bool = False) -> bytes:
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3" + bytes([4, 0, 0x10 if footer else 0]) + syncsafe
+
+
+def test_id3v2_size():
+    assert _id3v2_size(io.BytesIO(_id3(300) + bytes(300) + b"\xff\xfb")) == 310
+    assert _id3v2_size(io.BytesIO(_id3(300, footer=True) + bytes(310))) == 320
+    assert _id3v2_size(io.BytesIO(b"\xff\xfb\x90\x64" + bytes(20))) == 0
+    assert _id3v2_size(io.BytesIO(b"ID3")) == 0
+
+
+def test_id3v2_size_remet_le_fichier_au_debut():
+    f = io.BytesIO(_id3(5) + bytes(5))
+    _id3v2_size(f)
+    assert f.tell() == 0
+
+
+def test_ajouter_mp3_retire_les_etiquettes_des_segments_suivants(tmp_path):
+    frames = b"\xff\xfb\x90\x64" + bytes(200)
+    segment = _id3(20) + bytes(20) + frames + b"TAG" + bytes(125)
+    src = tmp_path / "seg.mp3"
+    src.write_bytes(segment)
+
+    out = io.BytesIO()
+    _ajouter_mp3(src, out, premier=True)
+    _ajouter_mp3(src, out, premier=False)
+    assert out.getvalue() == segment + frames
@@ -0,0 +1,33 @@
+from app.core.checkpoint import JsonlCheckpoint
+
+
+def test_load_absent(tmp_path):
+    assert JsonlCheckpoint(tmp_path / "ckpt.jsonl").load() == []
+
+
+def test_append_puis_load(tmp_path):
+    ckpt = JsonlCheckpoint(tmp_path / "ckpt.jsonl")
+    ckpt.append({"hash": "a"})
+    ckpt.append({"hash": "b"})
+    ckpt.close()
+    assert JsonlCheckpoint(ckpt.path).load() == [{"hash": "a"}, {"hash": "b"}]
+
+
+def test_reprise_apres_ligne_tronquee(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    path.write_text('{"hash": "a"}\n{"hash": "b", "resu', encoding="utf-8")
+
+    ckpt = JsonlCheckpoint(path)
+    assert ckpt.load() == [{"hash": "a"}]
+    ckpt.append({"hash": "c"})
+    ckpt.close()
+
+    # le résultat écrit après la reprise n'est pas perdu à la reprise suivante
+    assert JsonlCheckpoint(path).load() == [{"hash": "a"}, {"hash": "c"}]
+
+
+def test_clear(tmp_path):
+    ckpt = JsonlCheckpoint(tmp_path / "ckpt.jsonl")
+    ckpt.append({"hash": "a"})
+    ckpt.clear()
+    assert not ckpt.path.exists()
@@ -0,0 +1,25 @@
+import feedparser
+
+from app.agents.agent_1_collector import _parse_entry
+
+RSS = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>L'Équipe</title>
+<item><title>PSG wins the final</title><link>https://www.lequipe.fr/football/psg</link>
+<description>&lt;p&gt;Paris beat Inter.&lt;/p&gt;</description></item>
+</channel></rss>"""
+
+
+def test_parse_entry_source_titre_du_flux():
+    feed = feedparser.parse(RSS)
+    art = _parse_entry(feed.entries[0], feed.feed.get("title", ""))
+    assert art["source"] == "L'Équipe"
+    assert art["resume"] == "Paris beat Inter."
+
+
+def test_parse_entry_source_domaine_sans_titre():
+    feed = feedparser.parse(RSS)
+    assert _parse_entry(feed.entries[0])["source"] == "www.lequipe.fr"
+
+
+def test_parse_entry_sans_lien():
+    assert _parse_entry({"title": "Sans lien"}) is None
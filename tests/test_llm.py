@@ -0,0 +1,91 @@
+import json
+
+import pytest
+import requests
+
+from app.core import llm, transport
+from app.core.providers import Provider
+from app.core.rate_limiter import RateLimiter
+
+
+def test_groq_post_cassette_absente_sans_nouvel_essai(monkeypatch):
+    calls = []
+
+    def request(*args, **kwargs):
+        calls.append(args)
+        raise transport.CassetteMissError("Aucune cassette")
+
+    monkeypatch.setattr(transport, "request", request)
+    monkeypatch.setattr(llm.time, "sleep", lambda s: pytest.fail("attente inutile avant un nouvel essai"))
+
+    with pytest.raises(transport.CassetteMissError):
+        llm.groq_post("http://127.0.0.1/v1/chat/completions", {}, retries=3)
+    assert len(calls) == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.content = json.dumps(data).encode("utf-8")
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+def _provider(name):
+    return Provider(name, "http://127.0.0.1/v1", "model")
+
+
+def _post(responses, sent):
+    def groq_post(url, payload, **kwargs):
+        sent.append(payload)
+        return responses.pop(0)
+    return groq_post
+
+
+def test_mode_json_garde_sur_400_sans_rapport(monkeypatch):
+    sent = []
+    error = {"error": {"message": "Please reduce the length of the messages", "code": "context_length_exceeded"}}
+    monkeypatch.setattr(llm, "groq_post", _post([FakeResponse(400, error)], sent))
+    provider = _provider("groq")
+
+    payload = llm._chat_payload("sys", "user", 0, 10, llm.JSON_FORMAT)
+    content, _, status, _ = llm._chat_http(payload, 10, provider, 0, "test")
+
+    assert (content, status) == ("", 400)
+    assert provider.json_mode is True
+    assert len(sent) == 1
+
+
+def test_mode_json_coupe_pour_le_seul_fournisseur_qui_le_refuse(monkeypatch):
+    sent = []
+    error = {"error": {"message": "response_format `json_object` is not supported", "param": "response_format"}}
+    ok = {"choices": [{"message": {"content": '{"a": 1}'}}], "usage": {}}
+    monkeypatch.setattr(llm, "groq_post", _post([FakeResponse(400, error), FakeResponse(200, ok)], sent))
+    provider, other = _provider("secours"), _provider("groq")
+
+    payload = llm._chat_payload("sys", "user", 0, 10, llm.JSON_FORMAT)
+    content, _, status, _ = llm._chat_http(payload, 10, provider, 0, "test")
+
+    assert (content, status) == ('{"a": 1}', 200)
+    assert provider.json_mode is False and other.json_mode is True
+    assert "response_format" in sent[0] and "response_format" not in sent[1]
+
+
+def test_erreur_http_rend_les_tokens_reserves(monkeypatch):
+    error = {"error": {"message": "Service unavailable"}}
+    monkeypatch.setattr(llm, "groq_post", _post([FakeResponse(503, error)], []))
+    provider = _provider("groq")
+    provider.limiter = RateLimiter(rpm=0, tpm=600, headroom=1)
+    provider.limiter.acquire(600)
+
+    payload = llm._chat_payload("sys", "user", 0, 10)
+    content, _, status, _ = llm._chat_http(payload, 600, provider, 0, "test")
+
+    assert (content, status) == ("", 503)
+    assert provider.limiter._reserve(600) == 0
@@ -0,0 +1,62 @@
+import os
+import time
+
+from app.core import llm_cache
+from app.core.llm_cache import LLMCache
+
+
+def _disk_size(cache):
+    return sum(p.stat().st_size for p in cache.dir.glob("*/*.json"))
+
+
+def test_get_put(tmp_path):
+    cache = LLMCache(tmp_path, max_mb=1, ttl_days=1)
+    key = LLMCache.key("m", "sys", "user", 0.3, 100)
+    assert cache.get(key) is None
+    cache.put(key, "réponse", upstream_bytes=42)
+    assert cache.get(key) == "réponse"
+    assert cache.stats()["bytes_saved"] == 42
+
+
+def test_cle_depend_du_format_de_reponse():
+    assert LLMCache.key("m", "s", "u", 0, 10) != LLMCache.key("m", "s", "u", 0, 10, {"type": "json_object"})
+
+
+def test_taille_inchangee_quand_une_entree_est_remplacee(tmp_path):
+    cache = LLMCache(tmp_path, max_mb=1, ttl_days=1)
+    key = LLMCache.key("m", "sys", "user", 0.3, 100)
+    for _ in range(5):
+        cache.put(key, "même réponse")
+    assert cache.stats()["size_bytes"] == _disk_size(cache)
+
+    cache.put(key, "réponse plus longue " * 10)
+    assert cache.stats()["size_bytes"] == _disk_size(cache)
+
+
+def test_entree_expiree_supprimee(tmp_path, monkeypatch):
+    cache = LLMCache(tmp_path, max_mb=1, ttl_days=1)
+    key = LLMCache.key("m", "sys", "user", 0.3, 100)
+    cache.put(key, "ancienne")
+
+    later = time.time() + 2 * 86400
+    monkeypatch.setattr(llm_cache.time, "time", lambda: later)
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+    assert cache.stats()["size_bytes"] == 0
+
+    cache.put(key, "nouvelle")
+    assert cache.stats()["size_bytes"] == _disk_size(cache)
+
+
+def test_eviction_lru(tmp_path):
+    cache = LLMCache(tmp_path, max_mb=0.002, ttl_days=1)  # ~2 Ko
+    keys = [LLMCache.key("m", "sys", str(i), 0, 10) for i in range(8)]
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 400)
+        old = time.time() - 100 + i
+        os.utime(cache._path(key), (old, old))
+
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+    assert cache.stats()["size_bytes"] == _disk_size(cache)
+    assert cache.get(keys[-1]) is not None
+    assert cache.get(keys[0]) is None
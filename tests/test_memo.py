@@ -0,0 +1,41 @@
+import threading
+import time
+
+from app.core.memo import MemoLRU, SingleFlight
+
+
+def test_memo_lru_borne():
+    memo = MemoLRU(2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == 1  # "a" devient le plus récent
+    memo.put("c", 3)
+    assert memo.get("b") is None
+    assert (memo.get("a"), memo.get("c")) == (1, 3)
+
+
+def test_memo_desactive():
+    memo = MemoLRU(0)
+    memo.put("a", 1)
+    assert memo.get("a") is None
+
+
+def test_single_flight_un_seul_appel():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return "résultat"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["résultat"] * 5
+    assert len(calls) == 1
+    assert flight.shared == 4
@@ -0,0 +1,34 @@
+from app.core.near_duplicates import cluster_near_duplicates, jaccard, merge_near_duplicates, normalize
+
+
+def _article(h, titre, resume="", source="src", image=None):
+    return {"hash": h, "titre": titre, "resume": resume, "source": source, "url": f"https://{h}", "image": image}
+
+
+def test_normalize():
+    assert normalize("<b>L'IA générative</b> et les LLM") == ["l", "ia", "generative", "llm"]
+
+
+def test_jaccard():
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+    assert jaccard(set(), {"a"}) == 0.0
+
+
+def test_reprise_fusionnee_dans_l_article_le_plus_riche():
+    titre = "OpenAI unveils a new reasoning model for developers"
+    articles = [
+        _article("a", titre, "Short summary of the announcement."),
+        _article("b", "Apple ships a new chip for laptops", "Completely unrelated hardware news today."),
+        _article("c", titre, "Short summary of the announcement, with many more details added.", source="reprise"),
+    ]
+    assert cluster_near_duplicates(articles) == [[0, 2], [1]]
+
+    merged = merge_near_duplicates(articles)
+    assert [a["hash"] for a in merged] == ["c", "b"]
+    assert merged[0]["sources_alternatives"] == [{"source": "src", "url": "https://a", "hash": "a"}]
+    assert "sources_alternatives" not in merged[1]
+
+
+def test_articles_courts_jamais_regroupes():
+    articles = [_article("a", "IA"), _article("b", "IA")]
+    assert cluster_near_duplicates(articles) == [[0], [1]]
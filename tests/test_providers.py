@@ -0,0 +1,21 @@
+from app.core.providers import _fallback_configs
+
+
+def test_fallback_configs_vide():
+    assert _fallback_configs("") == []
+    assert _fallback_configs("  ") == []
+
+
+def test_fallback_configs_valides():
+    raw = '[{"name": "secours", "base_url": "http://127.0.0.1:8000/v1"}]'
+    assert _fallback_configs(raw) == [{"name": "secours", "base_url": "http://127.0.0.1:8000/v1"}]
+
+
+def test_fallback_configs_illisible_ignore():
+    assert _fallback_configs("[{name: secours") == []
+    assert _fallback_configs('{"base_url": "http://x"}') == []
+
+
+def test_fallback_configs_entree_sans_base_url_ignoree():
+    raw = '[{"name": "incomplet"}, "x", {"base_url": "http://x/v1"}]'
+    assert _fallback_configs(raw) == [{"base_url": "http://x/v1"}]
@@ -0,0 +1,31 @@
+from app.core.rate_limiter import RateLimiter
+
+
+def test_release_rend_les_tokens_reserves():
+    limiter = RateLimiter(rpm=0, tpm=600, headroom=1)  # 10 tokens/s
+    assert limiter.acquire(600) == 0
+    limiter.release(600)
+    assert limiter._reserve(600) == 0
+
+
+def test_sans_release_le_quota_reste_pris():
+    limiter = RateLimiter(rpm=0, tpm=600, headroom=1)
+    limiter.acquire(600)
+    limiter.reconcile(600, 0)  # usage inconnu : l'estimation reste comptée
+    assert limiter._reserve(600) > 50
+
+
+def test_reconcile_rend_la_difference():
+    limiter = RateLimiter(rpm=0, tpm=600, headroom=1)
+    limiter.acquire(600)
+    limiter.reconcile(600, 100)
+    assert 0 < limiter._reserve(600) <= 11
+
+
+def test_reset_stats():
+    limiter = RateLimiter(rpm=60, tpm=0, headroom=1)
+    for _ in range(3):
+        limiter.acquire(0)
+    assert limiter.stats()["calls"] == 3
+    limiter.reset_stats()
+    assert limiter.stats()["calls"] == 0
@@ -0,0 +1,56 @@
+from app.core.seen_index import SeenIndex, KEY_LEN
+
+DAY = 86400
+
+
+def _index(tmp_path, window_days=7):
+    return SeenIndex(path=tmp_path / "seen.json", window_days=window_days)
+
+
+def test_mark_et_filter_new(tmp_path):
+    index = _index(tmp_path)
+    index.mark([{"hash": "a" * 32}])
+    articles = [{"hash": "a" * 32}, {"hash": "b" * 32}]
+    assert index.filter_new(articles) == [{"hash": "b" * 32}]
+    assert "a" * KEY_LEN in index
+
+
+def test_premier_passage_fait_foi(tmp_path):
+    index = _index(tmp_path)
+    index.mark([{"hash": "a" * 32}], now=1000)
+    index.mark([{"hash": "a" * 32}], now=2000)
+    assert index.evict(now=1000 + 7 * DAY + 1) == 1
+
+
+def test_eviction_hors_fenetre(tmp_path):
+    index = _index(tmp_path, window_days=7)
+    now = 10 * DAY
+    index.mark([{"hash": "vieux"}], now=now - 8 * DAY)
+    index.mark([{"hash": "recent"}], now=now - 1 * DAY)
+    assert index.evict(now=now) == 1
+    assert "recent" in index and "vieux" not in index
+
+
+def test_save_puis_rechargement_evince(tmp_path):
+    index = _index(tmp_path, window_days=7)
+    index.mark([{"hash": "vieux"}], now=1)
+    index.mark([{"hash": "recent"}])
+    index.save()
+
+    reloaded = _index(tmp_path, window_days=7)
+    assert len(reloaded) == 1
+    assert "recent" in reloaded
+
+
+def test_reprise_d_un_article_deja_vu(tmp_path):
+    index = _index(tmp_path)
+    index.mark([{"hash": "original"}])
+    reprise = {"hash": "reprise", "sources_alternatives": [{"hash": "original"}]}
+    assert index.filter_new([reprise]) == []
+
+
+def test_mark_enregistre_les_reprises(tmp_path):
+    index = _index(tmp_path)
+    index.mark([{"hash": "garde", "sources_alternatives": [{"hash": "fusionne"}, {"url": "sans-hash"}]}])
+    assert "garde" in index and "fusionne" in index
+    assert len(index) == 2
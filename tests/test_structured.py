@@ -0,0 +1,34 @@
+import pytest
+
+from app.core.structured import parse_json, valider
+
+SCHEMA = {"indices_selection": [int], "index_audio": int, "titre": (str, type(None))}
+
+
+def test_parse_json_strict():
+    assert parse_json('{"a": 1}') == {"a": 1}
+
+
+def test_parse_json_texte_autour():
+    assert parse_json('Voici :\n```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize("text", ["", "   ", "pas de JSON", '{"a": }'])
+def test_parse_json_illisible(text):
+    with pytest.raises(ValueError):
+        parse_json(text)
+
+
+def test_valider_conforme():
+    assert valider({"indices_selection": [1, 2], "index_audio": 0, "titre": None}, SCHEMA) is None
+
+
+@pytest.mark.parametrize("data, erreur", [
+    ([], "$ : objet attendu"),
+    ({"indices_selection": [1], "titre": "t"}, "$.index_audio : champ manquant"),
+    ({"indices_selection": [1, "2"], "index_audio": 0, "titre": "t"}, "$.indices_selection[1] : int attendu"),
+    ({"indices_selection": [], "index_audio": True, "titre": "t"}, "$.index_audio : int attendu"),
+    ({"indices_selection": [], "index_audio": 0, "titre": 3}, "$.titre : str ou NoneType attendu"),
+])
+def test_valider_erreurs(data, erreur):
+    assert valider(data, SCHEMA) == erreur
@@ -0,0 +1,32 @@
+from app.core import telemetry as telemetry_module
+from app.core.telemetry import Telemetry
+
+
+def test_reset_demarre_un_nouveau_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry_module, "RUN_REPORT_DIR", tmp_path)
+    telemetry = Telemetry()
+    telemetry.record("chat", "analyse", "groq", 200, 0.5, prompt_tokens=10, completion_tokens=5)
+    first = telemetry.write_report()
+
+    telemetry.reset()
+    telemetry.record("chat", "analyse", "groq", 500, 0.2)
+    second = telemetry.write_report()
+
+    assert first != second
+    assert telemetry.summary()["analyse"]["appels"] == 1
+    assert telemetry.summary()["analyse"]["erreurs"] == 1
+
+
+def test_summary_par_etape():
+    telemetry = Telemetry()
+    for seconds in (0.1, 0.2, 3):
+        telemetry.record("chat", "analyse", "groq", 200, seconds, queue_s=1, prompt_tokens=100, completion_tokens=50)
+    telemetry.record("tts", "audio", "groq", None, 1, caracteres=300)
+
+    summary = telemetry.summary()
+    assert summary["analyse"]["appels"] == 3
+    assert summary["analyse"]["tokens_prompt"] == 300
+    assert summary["analyse"]["attente_totale_s"] == 3
+    assert summary["analyse"]["duree_p95_s"] == 3
+    assert summary["audio"]["erreurs"] == 1
+    assert summary["audio"]["caracteres_tts"] == 300
@@ -0,0 +1,43 @@
+from app.core.tokens import nettoyer_texte, tronquer, CHARS_PER_TOKEN
+
+
+def test_nettoyer_texte_retire_html_et_entites():
+    html = "<p>Hello&nbsp;<b>world</b> &amp; co</p><script>alert(1)</script>"
+    assert nettoyer_texte(html) == "Hello world & co"
+
+
+def test_nettoyer_texte_retire_formules_de_fin():
+    text = "Big news today. The post Big news appeared first on Example Blog."
+    assert nettoyer_texte(text) == "Big news today."
+    assert nettoyer_texte("Big news today. Continue reading Big news on Example") == "Big news today."
+    assert nettoyer_texte("Grosse annonce. Lire la suite…") == "Grosse annonce."
+    assert nettoyer_texte("Big news today… Read more »") == "Big news today…"
+    assert nettoyer_texte("Texte tronqué [+1234 chars]") == "Texte tronqué"
+
+
+def test_nettoyer_texte_garde_read_more_en_milieu_de_phrase():
+    text = (
+        "OpenAI announced GPT-5 today. Analysts who read more about the licensing "
+        "terms say pricing changes…"
+    )
+    assert nettoyer_texte(text) == text
+    text = "Continue reading this. The model was trained on public data."
+    assert nettoyer_texte(text) == text
+
+
+def test_tronquer_texte_court_inchange():
+    assert tronquer("Une phrase.", 10) == "Une phrase."
+    assert tronquer("", 10) == ""
+
+
+def test_tronquer_coupe_en_fin_de_phrase():
+    text = "Première phrase assez longue. Deuxième phrase. " + "mot " * 50
+    out = tronquer(text, 12)
+    assert out == "Première phrase assez longue. Deuxième phrase."
+    assert len(out) <= 12 * CHARS_PER_TOKEN
+
+
+def test_tronquer_coupe_en_fin_de_mot_sans_phrase():
+    out = tronquer("mot " * 100, 10)
+    assert out.endswith("mot…")
+    assert len(out) <= 10 * CHARS_PER_TOKEN + 1
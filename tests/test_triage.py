@@ -0,0 +1,47 @@
+from app.core.triage import enrichir_sans_llm, score_articles, trier
+
+SPORT = {
+    "titre": "PSG wins the Champions League final",
+    "resume": "Paris Saint-Germain beat Inter 2-1 in Munich.",
+    "url": "https://www.lequipe.fr/football/article",
+    "theme": "sport",
+    "themes": ["sport"],
+}
+IA = {
+    "titre": "OpenAI releases a new GPT model for developers",
+    "resume": "The LLM improves reasoning and inference costs for machine learning teams.",
+    "url": "https://openai.com/blog/new-model",
+    "theme": "intelligence artificielle",
+    "themes": ["intelligence artificielle"],
+}
+
+
+def test_article_hors_ia_pas_penalise_par_le_vocabulaire_ia():
+    keep, skipped, scores = trier([SPORT, IA])
+    assert keep == [0, 1]
+    assert skipped == []
+
+
+def test_article_ia_hors_sujet_ecarte():
+    hors_sujet = dict(SPORT, theme="intelligence artificielle", themes=["intelligence artificielle"])
+    keep, skipped, _ = trier([hors_sujet, IA])
+    assert keep == [1] and skipped == [0]
+
+
+def test_article_sans_theme_traite_comme_ia():
+    sans_theme = {k: v for k, v in SPORT.items() if k not in ("theme", "themes")}
+    avec_ia = dict(SPORT, themes=["intelligence artificielle"])
+    assert score_articles([sans_theme])[0] == score_articles([avec_ia])[0]
+
+
+def test_bruit_penalise():
+    offre = dict(SPORT, titre="We're hiring: football data analyst")
+    assert score_articles([offre])[0] < score_articles([SPORT])[0]
+
+
+def test_enrichir_sans_llm_sous_theme_du_theme():
+    assert enrichir_sans_llm(SPORT, 0.1)["sous_theme"] == "sport"
+    ia = enrichir_sans_llm(IA, 0.9)
+    assert ia["sous_theme"] == "LLM"
+    assert ia["analyse"] == "triage"
+    assert ia["importance"] == 3